@@ -1,4 +1,6 @@
+import mimetypes
 import os
+import time
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -6,13 +8,39 @@ load_dotenv()
 from enum import Enum
 from flask import (
     Flask, 
+    Response,
+    before_render_template,
+    g,
+    request,
+    send_file,
+    template_rendered,
 )
 
 from routes.landing.landing_route import landing_bp
 from routes.home.home_routes import home_bp
 from routes.admin.admin_routes import admin_bp
 
+from utils.assets import get_asset_version
+from utils.bundles import get_page_assets
+from utils.compression import (
+    DYNAMIC_MIMETYPES,
+    DYNAMIC_MIN_SIZE,
+    compress,
+    compress_stream,
+    get_compressed_path,
+    get_encodings,
+    has_compressed_siblings,
+)
 from utils.config import CFG
+from utils.logger import logger
+from utils.metrics import REQUEST_DURATION, REQUESTS, metrics
+from utils.timing import (
+    TIMING_ENABLED,
+    finish_request,
+    on_render_end,
+    on_render_start,
+    start_request,
+)
 
 
 def get_app() -> Flask:
@@ -20,12 +48,69 @@ def get_app() -> Flask:
     app = Flask(__name__)
     app.secret_key = os.getenv("SECRET_KEY", os.urandom(24))
 
+    _init_timing(app)
+    _init_metrics(app)
     _init_security_headers(app)
+    _init_cache_headers(app)
+    _init_static_fingerprints(app)
+    _init_compression(app)
+    _init_bundles(app)
     _init_session(app)
     _init_blueprints(app)
     return app
 
 
+def _init_timing(app: Flask) -> None:
+    """
+    With REQUEST_TIMING=True, logs the wall time of each request with the time spent in
+    storage calls, template rendering and directory scans, and sends it as Server-Timing.
+    Registered first so its after_request runs last and the total covers the other hooks.
+    """
+    if not TIMING_ENABLED:
+        return
+
+    before_render_template.connect(on_render_start, app)
+    template_rendered.connect(on_render_end, app)
+
+    @app.before_request
+    def start_timing() -> None:
+        start_request()
+
+    @app.after_request
+    def add_server_timing(response: Response) -> Response:
+        timings = finish_request()
+        if timings is None or request.endpoint == "static":
+            return response
+
+        metrics = timings.to_dict()
+        response.headers["Server-Timing"] = timings.get_header()
+        summary = " ".join(f"{name}={metric['ms']}ms" for name, metric in metrics.items())
+        logger.timing("{} {} {} {}", request.method, request.path, response.status_code, summary,
+                      endpoint=request.endpoint, status=response.status_code, timings=metrics)
+        return response
+
+    @app.teardown_request
+    def stop_timing(_) -> None:
+        # after_request is skipped on unhandled errors
+        finish_request()
+
+
+def _init_metrics(app: Flask) -> None:
+    """Counts requests and records their latency per endpoint for /admin/metrics."""
+    @app.before_request
+    def start_metrics() -> None:
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_metrics(response: Response) -> Response:
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            endpoint = request.endpoint or "none"
+            metrics.inc(REQUESTS, endpoint, request.method, str(response.status_code))
+            metrics.observe(REQUEST_DURATION, time.perf_counter() - start, endpoint)
+        return response
+
+
 def _init_security_headers(app: Flask) -> None:
     app.config["SECURITY_HEADERS"] = CFG.server.SECURITY_HEADERS
     @app.after_request
@@ -35,6 +120,96 @@ def _init_security_headers(app: Flask) -> None:
         return response
 
 
+def _init_cache_headers(app: Flask) -> None:
+    @app.after_request
+    def add_cache_headers(response: Response) -> Response:
+        if request.endpoint == "static":
+            filename = request.view_args.get("filename", "")
+            # Only a matching fingerprint is safe to cache forever, stale ones must revalidate
+            if response.status_code == 200 and request.args.get("v") == get_asset_version(filename):
+                response.headers["Cache-Control"] = ContentType.STATIC.cache_control
+            else:
+                response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        content_type = ContentType.from_mimetype(response.mimetype)
+        if content_type is not None and "Cache-Control" not in response.headers:
+            response.headers["Cache-Control"] = content_type.cache_control
+        return response
+
+
+def _init_static_fingerprints(app: Flask) -> None:
+    @app.url_defaults
+    def add_static_version(endpoint: str, values: dict) -> None:
+        """Adds a ?v= content hash to url_for('static', ...) so assets can be cached for a year."""
+        if endpoint == "static" and "v" not in values:
+            version = get_asset_version(values.get("filename", ""))
+            if version is not None:
+                values["v"] = version
+
+
+def _init_bundles(app: Flask) -> None:
+    app.jinja_env.globals["get_page_assets"] = get_page_assets
+
+
+def _init_compression(app: Flask) -> None:
+    static_view = app.view_functions["static"]
+
+    def static(filename: str) -> Response:
+        """Serves the precompressed .br/.gz sibling of a static file when the client accepts it."""
+        for encoding in _get_accepted_encodings():
+            path = get_compressed_path(filename, encoding)
+            if path is not None:
+                response = send_file(path, mimetype=mimetypes.guess_type(filename)[0])
+                response.headers["Content-Encoding"] = encoding
+                response.vary.add("Accept-Encoding")
+                return response
+
+        response = static_view(filename=filename)
+        # Shared caches must key the identity response like the compressed ones of the same URL
+        if has_compressed_siblings(filename):
+            response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = static
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        """Compresses dynamic text responses, streamed ones chunk by chunk."""
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in DYNAMIC_MIMETYPES):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encodings = _get_accepted_encodings()
+        if not encodings:
+            return response
+
+        encoding = encodings[0]
+        if response.is_streamed:
+            response.response = compress_stream(response.iter_encoded(), encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < DYNAMIC_MIN_SIZE:
+                return response
+            response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+
+        # The body differs per encoding, so only a weak ETag still holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def _get_accepted_encodings() -> list[str]:
+    """Returns the supported encodings the client accepts, in order of preference."""
+    return [encoding for encoding in get_encodings() if request.accept_encodings[encoding]]
+
+
 def _init_session(app: Flask) -> None:
     app.secret_key = os.getenv("SECRET_KEY", os.urandom(24))
     
@@ -59,6 +234,21 @@ def _init_blueprints(app):
 
 class ContentType(Enum):
     """Content types with their cache settings"""
-    STATIC = ["application/javascript", "image/", "font/"]
-    DOCUMENT = ["text/html", "text/css"]
-    API = ["application/json", "application/xml"]
+    # Fingerprinted assets never change under the same URL
+    STATIC = (["application/javascript", "text/javascript", "text/css", "image/", "font/"],
+              "public, max-age=31536000, immutable")
+    # Pages are per user and carry flashes and CSRF tokens
+    DOCUMENT = (["text/html"], "private, no-cache")
+    API = (["application/json", "application/xml"], "no-store")
+
+    def __init__(self, mimetypes: list[str], cache_control: str):
+        self.mimetypes = mimetypes
+        self.cache_control = cache_control
+
+    @classmethod
+    def from_mimetype(cls, mimetype: str | None) -> "ContentType | None":
+        """Returns the content type a mimetype belongs to, None when it has no cache setting."""
+        for content_type in cls:
+            if any((mimetype or "").startswith(prefix) for prefix in content_type.mimetypes):
+                return content_type
+        return None
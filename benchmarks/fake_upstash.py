@@ -0,0 +1,216 @@
+"""
+Local stand-in for the Upstash Redis REST API, for benchmarks without network access or credentials.
+Keeps data in memory and implements the commands utils/storage.py uses, with optional injected latency.
+
+    python benchmarks/fake_upstash.py [--port 8079] [--latency 20]
+
+then run the app with UPSTASH_REDIS_REST_URL=http://127.0.0.1:8079 and any UPSTASH_REDIS_REST_TOKEN.
+"""
+import argparse
+import base64
+import fnmatch
+import json
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any
+
+
+class FakeRedis:
+    """In memory Redis subset: strings, hashes, sorted sets, INCR, MGET, SCAN."""
+    def __init__(self):
+        self.data: dict[str, Any] = {}
+        self.lock = Lock()
+        self.commands = 0
+
+    def execute(self, command: list) -> Any:
+        name, args = str(command[0]).lower(), [str(arg) for arg in command[1:]]
+        handler = getattr(self, f"cmd_{name}", None)
+        if handler is None:
+            raise ValueError(f"ERR unknown command '{name}'")
+        with self.lock:
+            self.commands += 1
+            return handler(*args)
+
+    def cmd_set(self, key: str, value: str, *options: str) -> str | None:
+        if "NX" in (option.upper() for option in options) and key in self.data:
+            return None
+        self.data[key] = value
+        return "OK"
+
+    def cmd_get(self, key: str) -> str | None:
+        value = self.data.get(key)
+        return value if isinstance(value, str) else None
+
+    def cmd_mget(self, *keys: str) -> list[str | None]:
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_incr(self, key: str) -> int:
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value)
+        return value
+
+    def cmd_hset(self, key: str, *pairs: str) -> int:
+        hash = self.data.setdefault(key, {})
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in hash
+            hash[field] = value
+        return added
+
+    def cmd_hsetnx(self, key: str, field: str, value: str) -> int:
+        hash = self.data.setdefault(key, {})
+        if field in hash:
+            return 0
+        hash[field] = value
+        return 1
+
+    def cmd_hget(self, key: str, field: str) -> str | None:
+        return self.data.get(key, {}).get(field)
+
+    def cmd_hgetall(self, key: str) -> list[str]:
+        return [item for pair in self.data.get(key, {}).items() for item in pair]
+
+    def cmd_zadd(self, key: str, *pairs: str) -> int:
+        zset = self.data.setdefault(key, {})
+        added = 0
+        for score, member in zip(pairs[::2], pairs[1::2]):
+            added += member not in zset
+            zset[member] = float(score)
+        return added
+
+    def cmd_zrem(self, key: str, *members: str) -> int:
+        zset = self.data.get(key, {})
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    def cmd_zcard(self, key: str) -> int:
+        return len(self.data.get(key, {}))
+
+    def cmd_zrange(self, key: str, start: str, stop: str, *options: str) -> list[str]:
+        options = [option.upper() for option in options]
+        reverse = "REV" in options
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=reverse)
+        if "BYSCORE" in options:
+            low, high = (stop, start) if reverse else (start, stop)
+            items = [item for item in items if _above(item[1], low) and _below(item[1], high)]
+            if "LIMIT" in options:
+                index = options.index("LIMIT")
+                offset, count = int(options[index + 1]), int(options[index + 2])
+                items = items[offset:offset + count if count >= 0 else None]
+        else:
+            end = int(stop)
+            items = items[int(start):None if end == -1 else end + 1]
+        return [member for member, _ in items]
+
+    def cmd_scan(self, cursor: str, *options: str) -> list:
+        pattern, count = "*", 10
+        for option, value in zip(options[::2], options[1::2]):
+            if option.upper() == "MATCH":
+                pattern = value
+            elif option.upper() == "COUNT":
+                count = int(value)
+        keys = sorted(key for key in self.data if fnmatch.fnmatchcase(key, pattern))
+        start = int(cursor)
+        next_cursor = start + count if start + count < len(keys) else 0
+        return [str(next_cursor), keys[start:start + count]]
+
+
+def _above(score: float, bound: str) -> bool:
+    if bound.startswith("("):
+        return score > float(bound[1:])
+    return score >= float(bound)
+
+
+def _below(score: float, bound: str) -> bool:
+    if bound.startswith("("):
+        return score < float(bound[1:])
+    return score <= float(bound)
+
+
+def _encode(value: Any) -> Any:
+    """Base64 encodes strings as Upstash does for clients sending Upstash-Encoding: base64."""
+    if isinstance(value, str):
+        return value if value == "OK" else base64.b64encode(value.encode()).decode()
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+
+class FakeUpstash(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering Upstash REST requests, sleeping latency seconds per request.
+    While fail_status is set every request is answered with that status and a plain text body, like a failing gateway.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.redis = FakeRedis()
+        self.latency = latency
+        self.requests = 0
+        self.fail_status: int | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "FakeUpstash":
+        """Serves in a daemon thread."""
+        Thread(target=self.serve_forever, name="fake-upstash", daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # Headers and body are separate writes, with Nagle each response would wait for a delayed ACK
+    disable_nagle_algorithm = True
+    server: FakeUpstash
+
+    def log_message(self, *_) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.redis.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.fail_status is not None:
+            self._respond(self.server.fail_status, b"upstream unavailable", "text/plain")
+            return
+
+        if self.path.rstrip("/").endswith(("pipeline", "multi-exec")):
+            result = [self._execute(command) for command in body]
+        else:
+            result = self._execute(body)
+
+        self._respond(200, json.dumps(result).encode(), "application/json")
+
+    def _respond(self, status: int, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _execute(self, command: list) -> dict:
+        try:
+            return {"result": _encode(self.server.redis.execute(command))}
+        except Exception as e:
+            return {"error": str(e)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local Upstash REST stand-in")
+    parser.add_argument("--port", type=int, default=8079)
+    parser.add_argument("--latency", type=float, default=0.0, help="Milliseconds added to every request")
+    args = parser.parse_args()
+
+    server = FakeUpstash(args.port, args.latency / 1000)
+    print(f"Fake Upstash on {server.url} with {args.latency} ms latency")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold start benchmark: imports the app (run.py, as the serverless runtime does) in fresh
+interpreters and reports the wall time and the slowest packages from python -X importtime.
+
+    python benchmarks/import_time.py [--runs 20] [--module run] [--top 15] [--root <checkout>]
+
+--root measures another checkout (e.g. a git worktree of an older commit) for comparison.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from typing import Final
+
+
+ROOT: Final = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# No credentials: measures import cost without a network round trip to Upstash
+ENV: Final = {**os.environ, "STORAGE_BACKEND": "memory", "LOCAL_USERNAME": "benchmark"}
+
+
+def time_import(module: str, root: str = ROOT) -> float:
+    """Returns the seconds a fresh interpreter takes to import module."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=root, env=ENV, check=True)
+    return time.perf_counter() - start
+
+
+def get_slowest_packages(module: str, top: int, root: str = ROOT) -> list[tuple[int, str]]:
+    """Returns (microseconds, package) of the top level packages whose own import time is largest."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=root, env=ENV, check=True, capture_output=True, text=True)
+    packages: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(own)
+    return sorted(((own, package) for package, own in packages.items()), reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the cold start import time of the app")
+    parser.add_argument("--runs", type=int, default=20, help="Fresh interpreters to time")
+    parser.add_argument("--module", default="run", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+    parser.add_argument("--root", default=ROOT, help="Checkout to measure, defaults to this one")
+    args = parser.parse_args()
+
+    baseline = [time_import("sys") for _ in range(args.runs)]
+    timings = [time_import(args.module, args.root) for _ in range(args.runs)]
+    interpreter = statistics.median(baseline)
+    print(f"import {args.module}: median {(statistics.median(timings) - interpreter) * 1000:.1f} ms, "
+          f"min {(min(timings) - interpreter) * 1000:.1f} ms over {args.runs} runs "
+          f"(interpreter start {interpreter * 1000:.1f} ms subtracted)")
+
+    print("\nSlowest packages of one run (own import time of all their modules):")
+    for own, package in get_slowest_packages(args.module, args.top, args.root):
+        print(f"{own / 1000:8.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Load test of every page against a local Upstash stand-in (benchmarks/fake_upstash.py).
+Seeds a dataset of the given size, then requests each route through the Flask test client
+or a threaded WSGI server and reports p50/p95/p99 latency and throughput per route.
+The admin form posts each add a new weight or user, so they measure the write paths.
+
+    python benchmarks/load_test.py [--server test|wsgi] [--latency 20] [--requests 200] [--concurrency 8]
+                                   [--cold] [--trainings 500] [--weights 730] [--users 20] [--images 24]
+                                   [--save results.json] [--compare results.json --tolerance 20]
+
+Warm runs mostly measure cache hits. --cold clears the storage, training fragment and credential caches
+before every request, so each one reaches storage and --latency applies.
+--compare exits with status 1 when a route's p95 is more than --tolerance percent slower than the saved run.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from threading import Thread, local
+from typing import Callable, Final
+from urllib.parse import urlencode
+
+ROOT: Final = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_upstash import FakeUpstash
+
+
+USERNAME: Final = "admin"
+PASSWORD: Final = "benchmark"
+HEADERS: Final = {"Accept-Encoding": "br, gzip"}
+# A 1x1 PNG, only the file names matter to the pages
+PNG: Final = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d4944415478da63f8ffff3f0005fe02fea7d6a4ee0000000049454e44ae426082"
+)
+
+
+def seed(store, args: argparse.Namespace) -> list[str]:
+    """
+    Writes users, weight guesses, daily weights and calories and trainings through the storage facade.
+    Returns the seeded dates, newest first.
+    """
+    from utils.credentials import hash_password
+
+    today = datetime.date.today()
+    days = [(today - datetime.timedelta(days=i)).isoformat() for i in range(max(args.weights, args.trainings))]
+    rng = random.Random(1)
+
+    password = hash_password(PASSWORD)
+    store.add_user(USERNAME, password)
+    for i in range(args.users):
+        store.add_user(f"user{i}", password)
+        store.add_weight_guess(f"user{i}", days[0], round(rng.uniform(70, 90), 1))
+    store.add_weights([(day, round(rng.uniform(75, 85), 1)) for day in days[:args.weights]])
+    store.add_calories([(day, rng.randint(1800, 3200)) for day in days[:args.weights]])
+    for day in days[:args.trainings]:
+        exercises = [{"name": f"exercise {j}", "reps": rng.randint(5, 15)} for j in range(rng.randint(3, 8))]
+        store.add_training(day, rng.randint(30, 90), exercises)
+    return days
+
+
+def get_routes(days: list[str], trainings: int) -> list[tuple[str, str, str, Callable | dict | None, int]]:
+    """
+    Returns (name, method, path, form data, expected status) per route, other statuses count as errors.
+    Form data may be a function returning new data per request, so every write adds a new weight or user.
+    """
+    from routes.home.home_utils import TRAININGS_PER_PAGE
+
+    # Dates older than the seeded ones, each request adds one
+    oldest = datetime.date.fromisoformat(days[-1])
+    new_dates = (str(oldest - datetime.timedelta(days=i)) for i in count(1))
+    new_users = (f"load{i}" for i in count())
+
+    routes = [
+        ("landing", "GET", "/", None, 200),
+        # A failed login renders the form again with 200
+        ("login", "POST", "/", {"username": USERNAME, "password": PASSWORD}, 302),
+        ("home", "GET", "/home", None, 200),
+    ]
+    if trainings > TRAININGS_PER_PAGE:
+        # Older pages start before the last training of the page in front of them
+        routes.append(("home page 2", "GET", f"/home?before={days[TRAININGS_PER_PAGE - 1]}", None, 200))
+    routes += [
+        ("weight", "GET", "/weight", None, 200),
+        ("weight png", "GET", "/weight?mode=png", None, 200),
+        ("calories", "GET", "/calories", None, 200),
+        ("both", "GET", "/both", None, 200),
+        ("insta", "GET", "/insta", None, 200),
+        ("add user", "GET", "/admin/add-user", None, 200),
+        ("add user post", "POST", "/admin/add-user",
+         lambda: {"username": next(new_users), "password": PASSWORD, "password2": PASSWORD}, 302),
+        ("add weight", "GET", "/admin/add-weight", None, 200),
+        ("add weight post", "POST", "/admin/add-weight",
+         lambda: {"date": next(new_dates), "weight": "80.0"}, 302),
+        ("import weights", "GET", "/admin/import-weights", None, 200),
+    ]
+    return routes
+
+
+def create_images(count: int) -> None:
+    """Points the image directories of CFG at temporary ones holding count months of images."""
+    from utils.config import CFG
+
+    base = tempfile.mkdtemp(prefix="progress-benchmark-")
+    today = datetime.date.today().replace(day=1)
+    months = []
+    for _ in range(count):
+        months.append(today.strftime("%B_%Y").lower())
+        today = (today - datetime.timedelta(days=1)).replace(day=1)
+
+    for kind in ("weight", "calories", "both", "insta"):
+        directory = os.path.join(base, kind)
+        os.makedirs(directory)
+        names = [f"{kind}.png", f"{kind}_last_30.png"] if kind != "insta" else []
+        for month in months:
+            if kind == "insta":
+                names += [f"insta_{side}_{month}.png" for side in ("left", "back", "front", "right")]
+            else:
+                names.append(f"{kind}_{month}.png")
+        for name in names:
+            with open(os.path.join(directory, name), "wb") as file:
+                file.write(PNG)
+        setattr(CFG.dir, kind.upper(), directory)
+
+
+def get_session_cookie(app) -> str:
+    """Returns a signed session cookie of a logged in admin."""
+    serializer = app.session_interface.get_signing_serializer(app)
+    return f"{app.config['SESSION_COOKIE_NAME']}={serializer.dumps({'username': USERNAME})}"
+
+
+def create_test_client(app, cookie: str) -> Callable[[str, str, dict | None], int]:
+    """Returns request(method, path, data) -> status through a Flask test client per thread."""
+    clients = local()
+
+    def request(method: str, path: str, data: dict | None) -> int:
+        client = getattr(clients, "client", None)
+        if client is None:
+            client = clients.client = app.test_client()
+            # The test client sends the cookies of its jar in place of a Cookie header
+            client.set_cookie(*cookie.split("=", 1))
+        return client.open(path, method=method, data=data, headers=HEADERS).status_code
+
+    return request
+
+
+def create_wsgi_client(app, cookie: str) -> Callable[[str, str, dict | None], int]:
+    """Serves app on a threaded WSGI server and returns request(method, path, data) -> status over keep-alive."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class RequestHandler(WSGIRequestHandler):
+        # Headers and body are separate writes, with Nagle each response would wait for a delayed ACK
+        disable_nagle_algorithm = True
+
+        def log_request(self, *_) -> None:
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=RequestHandler)
+    Thread(target=server.serve_forever, name="benchmark-wsgi", daemon=True).start()
+    connections = local()
+
+    def request(method: str, path: str, data: dict | None) -> int:
+        connection = getattr(connections, "connection", None)
+        if connection is None:
+            connection = connections.connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        headers = {**HEADERS, "Cookie": cookie}
+        body = None
+        if data is not None:
+            body = urlencode(data)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.getheader("Connection", "").lower() == "close":
+            connection.close()
+            connections.connection = None
+        return response.status
+
+    return request
+
+
+def clear_caches() -> None:
+    """Drops every cached read, so the next request goes to storage."""
+    from routes.home.home_utils import TRAINING_FRAGMENTS
+    from utils.credentials import clear_verified
+    from utils.upstash import upstash
+
+    upstash.cache.clear()
+    TRAINING_FRAGMENTS.clear()
+    clear_verified()
+
+
+def run_route(request: Callable, method: str, path: str, data: Callable | dict | None, expected: int,
+              requests: int, concurrency: int, cold: bool = False) -> dict[str, float]:
+    """
+    Sends requests to one route from concurrency threads, clearing the caches before each one when cold.
+    A data function is called for the form data of each request.
+    Returns its latency percentiles, throughput and the requests not answered with the expected status.
+    """
+    def timed_request(_) -> tuple[float, int]:
+        if cold:
+            clear_caches()
+        form = data() if callable(data) else data
+        start = time.perf_counter()
+        status = request(method, path, form)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(timed_request, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency * 1000 for latency, _ in results]
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "p50": round(percentiles[49], 2),
+        "p95": round(percentiles[94], 2),
+        "p99": round(percentiles[98], 2),
+        "rps": round(requests / elapsed, 1),
+        "errors": sum(1 for _, status in results if status != expected),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Returns the routes whose p95 regressed by more than tolerance percent."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["p95"] > before["p95"] * (1 + tolerance / 100):
+            regressions.append(f"{name}: p95 {before['p95']} -> {result['p95']} ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test all pages against a local Upstash stand-in")
+    parser.add_argument("--server", choices=["test", "wsgi"], default="test",
+                        help="Flask test client, or a threaded WSGI server over HTTP")
+    parser.add_argument("--latency", type=float, default=20, help="Milliseconds added to every storage request")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per route")
+    parser.add_argument("--cold", action="store_true", help="Clear the caches before every request")
+    parser.add_argument("--trainings", type=int, default=500)
+    parser.add_argument("--weights", type=int, default=730, help="Days of weights and calories")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--images", type=int, default=24, help="Months of chart and insta images")
+    parser.add_argument("--routes", nargs="*", help="Names of the routes to run, all by default")
+    parser.add_argument("--save", help="Write the results as JSON")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=20, help="Allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    fake = FakeUpstash().start()
+    os.environ.update({
+        "UPSTASH_REDIS_REST_URL": fake.url,
+        "UPSTASH_REDIS_REST_TOKEN": "benchmark",
+        "STORAGE_BACKEND": "upstash",
+    })
+
+    from app import get_app
+    from utils.logger import logger
+    from utils.upstash import upstash
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    start = time.perf_counter()
+    days = seed(upstash, args)
+    create_images(args.images)
+    print(f"Seeded {args.trainings} trainings, {args.weights} days, {args.users} users, "
+          f"{args.images} months of images in {time.perf_counter() - start:.1f} s")
+    fake.latency = args.latency / 1000
+    seeded_requests = fake.requests
+
+    app = get_app()
+    app.config["WTF_CSRF_ENABLED"] = False
+    cookie = get_session_cookie(app)
+    create_client = create_wsgi_client if args.server == "wsgi" else create_test_client
+    request = create_client(app, cookie)
+
+    results = {}
+    print(f"\n{'route':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'errors':>8}{'storage/req':>13}")
+    for name, method, path, data, expected in get_routes(days, args.trainings):
+        if args.routes and name not in args.routes:
+            continue
+        for _ in range(args.warmup):
+            request(method, path, data() if callable(data) else data)
+        storage_requests = fake.requests
+        result = results[name] = run_route(request, method, path, data, expected,
+                                           args.requests, args.concurrency, args.cold)
+        # Storage round trips per page request, batched commands count once
+        result["storage"] = round((fake.requests - storage_requests) / args.requests, 2)
+        print(f"{name:<16}{result['p50']:>9}{result['p95']:>9}{result['p99']:>9}{result['rps']:>9}"
+              f"{result['errors']:>8}{result['storage']:>13}")
+    print(f"\n{fake.requests - seeded_requests} storage requests, {args.latency} ms each, "
+          f"{args.server} server, {args.concurrency} concurrent clients, {'cold' if args.cold else 'warm'} caches")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Regression {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
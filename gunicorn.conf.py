@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+
+
+# Settings per SERVER_PROFILE, single values can be overridden through the env vars below
+PROFILES = {
+    # Upstash calls are HTTPS round trips, threads keep workers busy while they wait
+    "production": {
+        "workers": min(multiprocessing.cpu_count() * 2 + 1, 8),
+        "threads": 8,
+        "preload_app": True,
+        "timeout": 30,
+        "loglevel": "info",
+    },
+    # Small containers (512 MB), fewer processes with more threads each
+    "small": {
+        "workers": 2,
+        "threads": 16,
+        "preload_app": True,
+        "timeout": 30,
+        "loglevel": "info",
+    },
+    "development": {
+        "workers": 1,
+        "threads": 4,
+        "preload_app": False,
+        "reload": True,
+        "timeout": 120,
+        "loglevel": "debug",
+    },
+}
+profile = PROFILES[os.getenv("SERVER_PROFILE", "production")]
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8080)}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", profile["workers"]))
+threads = int(os.getenv("GUNICORN_THREADS", profile["threads"]))
+preload_app = profile["preload_app"]
+reload = profile.get("reload", False)
+
+# Recycle workers to cap slow memory growth, jitter avoids restarting them all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", profile["timeout"]))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Worker heartbeats on tmpfs, a disk backed /tmp can stall them in containers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", profile["loglevel"])
+
+
+def post_fork(server, worker):
+    """Workers of a preloaded app must not share the storage connections of the master."""
+    if preload_app:
+        from utils import credentials
+        from utils.upstash import upstash
+
+        upstash.after_fork()
+        credentials.after_fork()
@@ -0,0 +1,163 @@
+import argparse
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from utils.logger import logger
+
+
+def migrate_records(args: argparse.Namespace) -> None:
+    """Rewrites legacy stored records in the current codec format."""
+    from utils.upstash import upstash
+
+    migrated = upstash.migrate_records()
+    logger.info(f"Migrated records: {migrated}")
+
+
+def add_user(args: argparse.Namespace) -> None:
+    """Adds a user, or sets the password of an existing one, storing the password hashed."""
+    from getpass import getpass
+
+    from utils.credentials import hash_password
+    from utils.upstash import upstash
+
+    if not upstash.persistent:
+        logger.error("No persistent storage backend configured")
+        sys.exit(1)
+    password = getpass("Password: ")
+    if not password or password != getpass("Repeat password: "):
+        logger.error("Passwords must match and not be empty")
+        sys.exit(1)
+    upstash.add_user(args.username, hash_password(password))
+    logger.info(f"Added user: {args.username}")
+
+
+def rebuild_training_index(args: argparse.Namespace) -> None:
+    """Indexes training keys written to Redis by other tools."""
+    from utils.upstash import upstash
+
+    added = upstash.rebuild_training_index()
+    logger.info(f"Indexed trainings: {added}")
+
+
+def import_weights(args: argparse.Namespace) -> None:
+    """Imports weights from a CSV file of date,weight rows."""
+    from utils.weights_io import import_weights as import_weight_rows
+
+    with open(args.path, encoding="utf-8-sig", newline="") as file:
+        result = import_weight_rows(file, overwrite=args.on_conflict == "overwrite", batch_size=args.batch_size)
+    for error in result["errors"]:
+        logger.warning(error)
+
+
+def import_calories(args: argparse.Namespace) -> None:
+    """Imports calories from a CSV file of date,calories rows."""
+    from utils.weights_io import import_calories as import_calorie_rows
+
+    with open(args.path, encoding="utf-8-sig", newline="") as file:
+        result = import_calorie_rows(file, overwrite=args.on_conflict == "overwrite", batch_size=args.batch_size)
+    for error in result["errors"]:
+        logger.warning(error)
+
+
+def render_charts(args: argparse.Namespace) -> None:
+    """Renders the weight, calories and both graphs whose data changed."""
+    from utils.charts import render_charts as render_changed_charts
+
+    for path in render_changed_charts(force=args.force):
+        logger.info(f"Rendered {path}")
+
+
+def build_images(args: argparse.Namespace) -> None:
+    """Builds the WebP/AVIF variants of the images whose PNG changed."""
+    from utils.images import build_image_variants
+
+    for path in build_image_variants(force=args.force):
+        logger.info(f"Built {path}")
+
+
+def build_assets(args: argparse.Namespace) -> None:
+    """Builds the page CSS/JS bundles and compresses the static text assets."""
+    from utils.bundles import build_bundles
+    from utils.compression import build_compressed_assets
+
+    for name, bundle in build_bundles().items():
+        logger.info(f"Bundled {name}: {bundle['css']} {bundle['js']}")
+    build_compressed_assets()
+
+
+def compress_static(args: argparse.Namespace) -> None:
+    """Writes .br/.gz siblings of the static text assets that changed."""
+    from utils.compression import build_compressed_assets
+
+    for path in build_compressed_assets(force=args.force):
+        logger.info(f"Compressed {path}")
+
+
+def export_weights(args: argparse.Namespace) -> None:
+    """Exports all weights as CSV to a file or stdout."""
+    from utils.weights_io import export_weights as export_weight_rows
+
+    output = open(args.path, "w", newline="") if args.path else sys.stdout
+    try:
+        output.writelines(export_weight_rows())
+    finally:
+        if args.path:
+            output.close()
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Progress management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate-records", help="Rewrite legacy trainings and weight guesses")
+    migrate.set_defaults(handler=migrate_records)
+
+    user_parser = commands.add_parser("add-user", help="Add a user or set its password (prompted for)")
+    user_parser.add_argument("username", help="Name to log in with, admin pages need the admin user")
+    user_parser.set_defaults(handler=add_user)
+
+    index_parser = commands.add_parser("rebuild-training-index",
+                                       help="Index training keys written outside the app")
+    index_parser.set_defaults(handler=rebuild_training_index)
+
+    import_parser = commands.add_parser("import-weights", help="Import weights from a date,weight CSV file")
+    import_parser.add_argument("path", help="CSV file to import")
+    import_parser.add_argument("--on-conflict", choices=["skip", "overwrite"], default="skip",
+                               help="What to do with dates that already have a weight")
+    import_parser.add_argument("--batch-size", type=int, default=500, help="Rows written per batch")
+    import_parser.set_defaults(handler=import_weights)
+
+    calories_parser = commands.add_parser("import-calories", help="Import calories from a date,calories CSV file")
+    calories_parser.add_argument("path", help="CSV file to import")
+    calories_parser.add_argument("--on-conflict", choices=["skip", "overwrite"], default="skip",
+                                 help="What to do with dates that already have calories")
+    calories_parser.add_argument("--batch-size", type=int, default=500, help="Rows written per batch")
+    calories_parser.set_defaults(handler=import_calories)
+
+    charts_parser = commands.add_parser("render-charts", help="Render graphs into static/images")
+    charts_parser.add_argument("--force", action="store_true", help="Render all charts, changed or not")
+    charts_parser.set_defaults(handler=render_charts)
+
+    images_parser = commands.add_parser("build-images", help="Build WebP/AVIF variants of static/images")
+    images_parser.add_argument("--force", action="store_true", help="Build all variants, changed or not")
+    images_parser.set_defaults(handler=build_images)
+
+    assets_parser = commands.add_parser("build-assets", help="Build page CSS/JS bundles and compress static files")
+    assets_parser.set_defaults(handler=build_assets)
+
+    compress_parser = commands.add_parser("compress-static", help="Write brotli/gzip siblings of static CSS/JS")
+    compress_parser.add_argument("--force", action="store_true", help="Compress all files, changed or not")
+    compress_parser.set_defaults(handler=compress_static)
+
+    export_parser = commands.add_parser("export-weights", help="Export weights as a date,weight CSV file")
+    export_parser.add_argument("path", nargs="?", help="Output file (default: stdout)")
+    export_parser.set_defaults(handler=export_weights)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_parser().parse_args()
+    args.handler(args)
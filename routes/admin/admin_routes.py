@@ -1,18 +1,24 @@
 from flask import (
     Blueprint,
+    Response,
     flash,
     render_template,
     redirect,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 
+from utils import credentials
 from utils.upstash import upstash
-from .admin_utils import AddUserForm, AddWeightForm
+from .admin_utils import AddUserForm, AddWeightForm, ImportWeightsForm
 from utils.misc import login_required, admin_required
 from utils.logger import logger
+from utils.metrics import metrics as metrics_registry
 from utils.config import CFG
+from utils.charts import render_charts_in_background
+from utils.weights_io import export_weights as export_weights_csv, import_weights_file
 
 
 admin_bp = Blueprint("admin", __name__)
@@ -32,16 +38,16 @@ def add_user():
         username = add_user_form.username.data
         password = add_user_form.password.data
         # Verify connection
-        if upstash.redis is None:
-            flash("Not connected to Upstash")
-            logger.error("Upstash Redis connection is None")
+        if not upstash.persistent:
+            flash("Not connected to storage")
+            logger.error("No persistent storage backend configured")
         # Verift not existing
         elif upstash.get_user(username):
             flash(f"User already exists: {username}")
-            logger.info(f"User already exists: {username=}")
+            logger.info("User already exists: username={!r}", username)
         # Add user
         else:
-            upstash.add_user(username, password)
+            upstash.add_user(username, credentials.hash_password(password))
             flash(f"Added user: {username}")
                 
         return redirect(url_for(CFG.redirect.add_user))
@@ -72,18 +78,19 @@ def add_weight():
         weight = float(add_weight_form.weight.data)
         existing_weight = upstash.get_weight(date)
         # Verify connection
-        if upstash.redis is None:
-            flash("Not connected to Upstash")
-            logger.error("Upstash Redis connection is None")
+        if not upstash.persistent:
+            flash("Not connected to storage")
+            logger.error("No persistent storage backend configured")
         # Verify not existing
         elif existing_weight:
             flash(f"Weight already exists: {date}")
-            logger.info(f"Weight already exists: {date}: {existing_weight}")
+            logger.info("Weight already exists: {}: {}", date, existing_weight)
         # Add weight
         else:
             upstash.add_weight(weight, date)
+            render_charts_in_background()
             flash(f"Added weight: {date}: {weight}")
-            logger.info(f"Added weight: {date=} {weight=}")
+            logger.info("Added weight: date={!r} weight={!r}", date, weight)
         
         return redirect(url_for(CFG.redirect.add_weight))
     
@@ -96,3 +103,65 @@ def add_weight():
         form_errors=form_errors,
         url=CFG.redirect.add_weight,
     )
+
+
+@admin_bp.route(CFG.route.import_weights, methods=["GET", "POST"])
+@login_required
+@admin_required
+def import_weights():
+    """Displays CSV weight import form."""
+    import_weights_form = ImportWeightsForm()
+    
+    if not import_weights_form.validate_on_submit():
+        session["form_errors"] = import_weights_form.errors
+    
+    else:
+        overwrite = import_weights_form.on_conflict.data == "overwrite"
+        # Verify connection
+        if not upstash.persistent:
+            flash("Not connected to storage")
+            logger.error("No persistent storage backend configured")
+        # Import weights
+        else:
+            result = import_weights_file(import_weights_form.file.data.stream, overwrite)
+            if result["written"]:
+                render_charts_in_background()
+            flash(f"Imported weights: {result['written']} written, {result['skipped']} skipped, {result['invalid']} invalid")
+            for error in result["errors"]:
+                logger.info("Invalid weight row: {}", error)
+        
+        return redirect(url_for(CFG.redirect.import_weights))
+    
+    form_errors = session.pop("form_errors", None)
+    
+    return render_template(
+        CFG.template.import_weights,
+        title="Import Weights",
+        import_weights_form=import_weights_form,
+        form_errors=form_errors,
+        url=CFG.redirect.import_weights,
+    )
+
+
+@admin_bp.route(CFG.route.export_weights, methods=["GET"])
+@login_required
+@admin_required
+def export_weights():
+    """Streams all weights as a CSV download."""
+    return Response(
+        stream_with_context(export_weights_csv()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=weights.csv"},
+    )
+
+
+@admin_bp.route(CFG.route.metrics, methods=["GET"])
+@login_required
+@admin_required
+def metrics():
+    """Request, storage and cache metrics of this worker in the Prometheus text format."""
+    return Response(
+        metrics_registry.render(),
+        mimetype="text/plain; version=0.0.4",
+        headers={"Cache-Control": "no-store"},
+    )
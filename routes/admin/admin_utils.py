@@ -1,12 +1,17 @@
 from flask_wtf import FlaskForm
-from wtforms import FloatField, StringField, HiddenField, SubmitField
+from flask_wtf.file import FileAllowed, FileField, FileRequired
+from wtforms import FloatField, StringField, HiddenField, SelectField, SubmitField
 from wtforms.validators import DataRequired, EqualTo, ValidationError
 from datetime import datetime
+import re
 
 
 def validate_date_format(form, field):
     """Checks for YYYY-MM-DD date format"""
     try:
+        # strptime alone accepts unpadded dates like 2025-1-5
+        if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", field.data or ""):
+            raise ValueError(field.data)
         datetime.strptime(field.data, "%Y-%m-%d")
     except ValueError:
         raise ValidationError("Must be YYYY-MM-DD")
@@ -57,3 +62,20 @@ class AddWeightForm(FlaskForm):
     )
     form_type = HiddenField(default="add_weight")
     submit = SubmitField(label="Add")
+
+
+class ImportWeightsForm(FlaskForm):
+    file = FileField(
+        label="CSV file",
+        validators=[
+            FileRequired(message="File is required"),
+            FileAllowed(["csv", "txt"], message="Must be a CSV file"),
+        ],
+    )
+    on_conflict = SelectField(
+        label="Existing dates",
+        choices=[("skip", "Skip"), ("overwrite", "Overwrite")],
+        default="skip",
+    )
+    form_type = HiddenField(default="import_weights")
+    submit = SubmitField(label="Import")
@@ -14,6 +14,10 @@ from .home_utils import (
     WeightGuessForm,
     get_insta_months_from_path,
     get_last_guess,
+    get_training_page,
+    render_trainings,
+    get_chart_mode,
+    get_chart_svg,
     get_months_from_path,
     get_insta_paths,
     get_insta_title,
@@ -21,7 +25,7 @@ from .home_utils import (
     get_title,
     get_guess_color,
 )
-from utils.misc import login_required
+from utils.misc import conditional, login_required
 from utils.upstash import upstash
 from utils.logger import logger
 from utils.config import CFG
@@ -32,9 +36,11 @@ home_bp = Blueprint("home", __name__)
 
 @home_bp.route(CFG.route.home, methods=["GET"])
 @login_required
+@conditional("trainings")
 def home():
-    """Displays empty page."""
-    trainings = upstash.get_trainings()
+    """Displays the most recent trainings, older ones are paginated by date."""
+    cursor = request.args.get("before")
+    trainings, next_cursor = get_training_page(cursor)
     url = CFG.redirect.home
     main_title = "Next"
     next_workout = "Sunday September 14th"
@@ -42,7 +48,9 @@ def home():
 
     return render_template(
         CFG.template.home,
-        trainings=trainings,
+        training_blocks=render_trainings(trainings),
+        cursor=cursor,
+        next_cursor=next_cursor,
         main_title=main_title,
         next_workout=next_workout,
         secondary_title=secondary_title,
@@ -52,6 +60,7 @@ def home():
 
 @home_bp.route(CFG.route.weight, methods=["GET", "POST"])
 @login_required
+@conditional("weights", "guesses")
 def weight():
     """Displays weight images and month selection."""
     weight_guess_form = WeightGuessForm()
@@ -69,9 +78,9 @@ def weight():
         return redirect(url_for(CFG.redirect.weight))
     
     # Get data
-    guess_date, guess_weight = get_last_guess(session["username"])
-    guess_result = upstash.get_weight(guess_date)
-    logger.info(f"username: {session['username']}, Guess date: {guess_date}, Guess weight: {guess_weight}, Guess result: {guess_result}")
+    guess_date, guess_weight, guess_result = get_last_guess(session["username"])
+    logger.info("username: {}, Guess date: {}, Guess weight: {}, Guess result: {}",
+                session["username"], guess_date, guess_weight, guess_result)
     # Generate colored result
     guess_color = ""
     if guess_weight is not None and guess_result is not None:
@@ -82,14 +91,18 @@ def weight():
     year = request.args.get('year')
 
     img_path = get_image_path(year, month, CFG.dir.WEIGHT_REL)
-    title = get_title(img_path, month)
+    title = get_title(img_path.src, month)
     all_months = get_months_from_path(CFG.dir.WEIGHT)
+    mode = request.args.get("mode")
+    svg = get_chart_svg("weight", year, month, all_months) if get_chart_mode(mode) == "svg" else None
     url = CFG.redirect.weight
     
     return render_template(
         CFG.template.graph,
         title=title,
         img_path=img_path,
+        svg=svg,
+        mode=mode,
         all_months=all_months,
         selected_year=year,
         selected_month=month,
@@ -105,20 +118,25 @@ def weight():
 
 @home_bp.route(CFG.route.calories, methods=["GET"])
 @login_required
+@conditional("calories")
 def calories():
     """Displays calories images and month selection."""
     month = request.args.get('month')
     year = request.args.get('year')
     
     img_path = get_image_path(year, month, CFG.dir.CALORIES_REL)
-    title = get_title(img_path, month)
+    title = get_title(img_path.src, month)
     all_months = get_months_from_path(CFG.dir.CALORIES)
+    mode = request.args.get("mode")
+    svg = get_chart_svg("calories", year, month, all_months) if get_chart_mode(mode) == "svg" else None
     url = CFG.redirect.calories
     
     return render_template(
         CFG.template.graph,
         title=title,
         img_path=img_path,
+        svg=svg,
+        mode=mode,
         all_months=all_months,
         selected_year=year,
         selected_month=month,
@@ -128,20 +146,25 @@ def calories():
 
 @home_bp.route(CFG.route.both, methods=["GET"])
 @login_required
+@conditional("weights", "calories")
 def both():
     """Displays calories and weight images and month selection."""
     month = request.args.get('month')
     year = request.args.get('year')
     
     img_path = get_image_path(year, month, CFG.dir.BOTH_REL)
-    title = get_title(img_path, month)
+    title = get_title(img_path.src, month)
     all_months = get_months_from_path(CFG.dir.BOTH)
+    mode = request.args.get("mode")
+    svg = get_chart_svg("both", year, month, all_months) if get_chart_mode(mode) == "svg" else None
     url = CFG.redirect.both
     
     return render_template(
         CFG.template.graph,
         title=title,
         img_path=img_path,
+        svg=svg,
+        mode=mode,
         all_months=all_months,
         selected_year=year,
         selected_month=month,
@@ -151,6 +174,7 @@ def both():
 
 @home_bp.route(CFG.route.insta, methods=["GET"])
 @login_required
+@conditional()
 def insta():
     """Displays insta images and month selection."""
     month = request.args.get('month')
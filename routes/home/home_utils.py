@@ -1,15 +1,40 @@
+import calendar
+import hashlib
+import json
 import os
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Callable, Final
 
+from flask import render_template
 from flask_wtf import FlaskForm
 from wtforms import FloatField, HiddenField, SubmitField
 from wtforms.validators import DataRequired, NumberRange
 
+from markupsafe import Markup
+
+from utils.cache import TTLCache
+from utils.charts import render_svg
+from utils.images import Picture, get_picture
+from utils.logger import logger
+from utils.metrics import metrics
+from utils.month_index import MonthIndex
 from utils.upstash import upstash
 from utils.config import CFG
 
 
+TRAININGS_PER_PAGE: Final = 10
+# Rendered training blocks, keyed by date and content hash so edited trainings re-render
+TRAINING_FRAGMENTS: Final = TTLCache(max_size=int(os.getenv("TRAINING_FRAGMENTS_SIZE", 512)))
+metrics.register_cache("training_fragments", TRAINING_FRAGMENTS)
+TRAINING_FRAGMENT_TTL: Final = 24 * 60 * 60
+# Month indexes per image directory, shared by the graph and insta views
+_month_indexes: dict[str, MonthIndex] = {}
+# Graph pages render an inline SVG or link the pre rendered PNG, ?mode= overrides the default
+CHART_MODES: Final = ("svg", "png")
+CHART_MODE: Final = os.getenv("CHART_MODE", "svg")
+
+
 class WeightGuessForm(FlaskForm):
     weight = FloatField(
         label="",
@@ -24,13 +49,105 @@ class WeightGuessForm(FlaskForm):
     submit = SubmitField(label="Guess")
 
 
-def get_last_guess(username: str) -> tuple[str | None, float | None]:
-    """Returns the last guess for a given username."""
-    return upstash.get_weight_guess(username)
+def get_last_guess(username: str) -> tuple[str | None, float | None, float | None]:
+    """
+    Returns the last guess for a given username as (date, weight, actual weight).
+    Guesses are made for tomorrow, so the weights of today and tomorrow are fetched along with
+    the guess; only an older guess needs a second lookup.
+    """
+    today = datetime.now().date()
+    likely_dates = [today.isoformat(), (today + timedelta(days=1)).isoformat()]
+    [result] = upstash.gather(upstash.aio.get_guess_result(username, likely_dates))
+    return result
+
+
+def get_training_page(cursor: str | None) -> tuple[dict[str, dict], str | None]:
+    """Returns a page of trainings older than cursor (newest first) and the cursor of the next page."""
+    if cursor is not None:
+        try:
+            datetime.strptime(cursor, "%Y-%m-%d")
+        except ValueError:
+            cursor = None
+    
+    # Fetch one extra to know if there is an older page
+    trainings = upstash.get_trainings(limit=TRAININGS_PER_PAGE + 1, cursor=cursor)
+    if len(trainings) <= TRAININGS_PER_PAGE:
+        return trainings, None
+    
+    dates = list(trainings)[:TRAININGS_PER_PAGE]
+    return {date: trainings[date] for date in dates}, dates[-1]
 
 
-def get_image_path(year: str | None, month: str | None, dir: str) -> str:
-    """Returns a weight image path for a given month and year."""
+def get_chart_mode(mode: str | None) -> str:
+    """Returns the requested chart mode, or the default for missing and unknown modes."""
+    return mode if mode in CHART_MODES else CHART_MODE
+
+
+def get_chart_period(year: str | None,
+                     month: str | None,
+                     all_months: list[tuple[str, str]]) -> tuple[str, str] | None:
+    """Returns the (start, end) dates shown for a month selection, None when it is unknown."""
+    today = datetime.now().date()
+    if month == "last_30":
+        return (today - timedelta(days=29)).isoformat(), today.isoformat()
+    if month is None:
+        if not all_months:
+            return None
+        # Months are sorted newest first
+        month, year = all_months[-1]
+        first = datetime.strptime(f"{month} {year}", "%B %Y").date()
+        return first.isoformat(), today.isoformat()
+
+    try:
+        first = datetime.strptime(f"{month} {year}", "%B %Y").date()
+    except ValueError:
+        return None
+    last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+    return first.isoformat(), last.isoformat()
+
+
+def get_chart_svg(kind: str,
+                  year: str | None,
+                  month: str | None,
+                  all_months: list[tuple[str, str]]) -> Markup | None:
+    """
+    Returns an inline SVG chart of kind (weight, calories or both) for a month selection.
+    Returns None when there is no data to draw, the page then falls back to the PNG.
+    """
+    period = get_chart_period(year, month, all_months)
+    if period is None:
+        return None
+
+    series = {}
+    if kind in ("weight", "both"):
+        series["Weight"] = upstash.get_weights(*period)
+    if kind in ("calories", "both"):
+        series["Calories"] = upstash.get_calories(*period)
+    try:
+        svg = render_svg(series)
+    except Exception as e:
+        logger.error("Error rendering {} svg: {}", kind, e)
+        return None
+    return Markup(svg) if svg else None
+
+
+def render_trainings(trainings: dict[str, dict]) -> list[Markup]:
+    """Returns the rendered table block of each training, reusing cached blocks of unchanged trainings."""
+    return [render_training(date, training) for date, training in trainings.items()]
+
+
+def render_training(date: str, training: dict) -> Markup:
+    """Returns the rendered table block of a training from the fragment cache or the template."""
+    digest = hashlib.sha1(json.dumps(training, sort_keys=True).encode()).hexdigest()
+    return TRAINING_FRAGMENTS.get_or_load(
+        (date, digest),
+        TRAINING_FRAGMENT_TTL,
+        lambda: Markup(render_template(CFG.template.training, training_data=training)),
+    )
+
+
+def get_image_path(year: str | None, month: str | None, dir: str) -> Picture:
+    """Returns the graph image for a given month and year, with its WebP/AVIF variants."""
     type = dir.split("/")[-1]
     if month == "last_30":
         path = f"{dir}/{type}_last_30.png"
@@ -38,11 +155,11 @@ def get_image_path(year: str | None, month: str | None, dir: str) -> str:
         path = f"{dir}/{type}.png"
     else:
         path = f"{dir}/{type}_{month.lower()}_{year}.png"
-    return path
+    return get_picture(path)
 
 
-def get_insta_paths(year: str | None, month: str | None) -> tuple[str, str, str, str]:
-    """Returns a tuple of insta image paths for a given month and year."""
+def get_insta_paths(year: str | None, month: str | None) -> tuple[Picture, Picture, Picture, Picture]:
+    """Returns a tuple of insta images for a given month and year, with their WebP/AVIF variants."""
     if month is None or year is None:
         month, year = get_insta_months_from_path(CFG.dir.INSTA)[0]
     
@@ -50,7 +167,7 @@ def get_insta_paths(year: str | None, month: str | None) -> tuple[str, str, str,
     back = f"{CFG.dir.INSTA_REL}/insta_back_{month.lower()}_{year}.png"
     front = f"{CFG.dir.INSTA_REL}/insta_front_{month.lower()}_{year}.png"
     right = f"{CFG.dir.INSTA_REL}/insta_right_{month.lower()}_{year}.png"
-    return left, back, front, right
+    return get_picture(left), get_picture(back), get_picture(front), get_picture(right)
 
 
 def get_title(path: str, month: str | None) -> str:
@@ -89,7 +206,12 @@ def get_file_data(names: list[str]) -> list[tuple[str, datetime]]:
 
 def get_months_from_path(path: str) -> list[tuple[str, str]]:
     """Returns a list of tuples of names from the path, sorted by date (newest first)."""
-    file_names = [file.replace(".png", "") for file in os.listdir(path)]
+    return _get_month_index(path, _parse_months).get()
+
+
+def _parse_months(files: list[str]) -> list[tuple[str, str]]:
+    """Returns the (month, year) of graph image files, sorted by date (newest first)."""
+    file_names = [file.replace(".png", "") for file in files if file.endswith(".png")]
     file_data = get_file_data(file_names)
     # Sort newest first
     file_data.sort(key=lambda x: x[1], reverse=True)
@@ -113,14 +235,26 @@ def get_insta_file_data(names: list[str]) -> list[tuple[str, datetime]]:
 
 def get_insta_months_from_path(path: str) -> list[tuple[str, str]]:
     """Returns a list of tuples of names from the path, sorted by date (newest first)."""
-    file_names = [file.replace(".png", "") for file in os.listdir(path)]
+    return _get_month_index(path, _parse_insta_months).get()
+
+
+def _parse_insta_months(files: list[str]) -> list[tuple[str, str]]:
+    """Returns the unique (month, year) of insta image files, sorted by date (newest first)."""
+    file_names = [file.replace(".png", "") for file in files if file.endswith(".png")]
     file_data = get_insta_file_data(file_names)
     # Sort newest first
     file_data.sort(key=lambda x: x[1], reverse=True)
-    # Format names to (month, year) and remove duplicates
-    names = list(set([(name.split("_")[2].title(), name.split("_")[3]) 
-            for name, _ in file_data]))
-    return names
+    # Format names to (month, year) and remove duplicates, keeping the order
+    names = [(name.split("_")[2].title(), name.split("_")[3]) for name, _ in file_data]
+    return list(dict.fromkeys(names))
+
+
+def _get_month_index(path: str, parse: Callable[[list[str]], list[tuple[str, str]]]) -> MonthIndex:
+    """Returns the shared month index of an image directory."""
+    index = _month_indexes.get(path)
+    if index is None:
+        index = _month_indexes.setdefault(path, MonthIndex(path, parse))
+    return index
 
 
 def get_guess_color(guess_weight: float, actual_weight: float) -> str:
@@ -8,8 +8,7 @@ from flask import (
     url_for,
 )
 
-from utils.upstash import upstash
-from .landing_utils import LoginForm, login_user
+from .landing_utils import LoginForm, authenticate, login_user
 from utils.logger import logger
 from utils.config import CFG
 
@@ -26,17 +25,16 @@ def landing():
 
             username = login_form.username.data
             password = login_form.password.data
-            user = upstash.get_user(username)
-            logger.info(f"Trying to login: {username=} {password=} {user=}")
+            logger.info("Trying to login: username={!r}", username)
 
-            if user is not None and user == password:
+            if authenticate(username, password):
                 login_user(username)
                 next_url = request.args.get("next")
                 flash(f"Welcome {username} :)")
                 return redirect(next_url or url_for(CFG.redirect.home))
             else:
                 flash("Incorrect credentials")
-                logger.info(f"Incorrect credentials: {username=}")
+                logger.info("Incorrect credentials: username={!r}", username)
         
         else:
             session["form_errors"] = login_form.errors
@@ -9,12 +9,28 @@ from wtforms import (
 )
 from wtforms.validators import DataRequired
 
+from utils import credentials
+from utils.upstash import upstash
+
 
 def login_user(username: str) -> None:
     """Adds username to session."""
     session["username"] = username
 
 
+def authenticate(username: str, password: str) -> bool:
+    """Verifies the password of username, upgrading plain text or outdated hashes it matches."""
+    stored = upstash.get_user(username)
+    if not credentials.verify_password(username, password, stored):
+        return False
+
+    if credentials.needs_rehash(stored) and upstash.persistent:
+        stored = credentials.hash_password(password)
+        upstash.add_user(username, stored)
+        credentials.remember(username, password, stored)
+    return True
+
+
 class LoginForm(FlaskForm):
     username = StringField(
         label="Username",
@@ -1,5 +1,9 @@
-import argparse
 import os
+import sys
+
+# --local has to be in the environment before the config is first read by get_app
+if __name__ == "__main__" and "--local" in sys.argv[1:]:
+    os.environ["DEBUG"] = "True"
 
 from app import get_app
 
@@ -8,6 +12,8 @@ application = app
 
 
 if __name__ == "__main__":
+    import argparse
+
     parser = argparse.ArgumentParser(description="Run the Flask application")
     parser.add_argument("--local", action="store_true", default=False, help="Run the application in debug mode")
     args = parser.parse_args()
@@ -0,0 +1,160 @@
+(()=>{
+// Nav hover effects
+const navLinks = document.querySelectorAll(".nav-link");
+
+navLinks.forEach(link => {
+    link.addEventListener("mouseenter", () => {
+        navLinks.forEach(otherLink => {
+            // Skip animation if the link is active
+            if (otherLink.classList.contains("is_current")) return;
+            
+            const animation = otherLink.animate(
+                [
+                    { color: getComputedStyle(otherLink).color },
+                    { color: otherLink === link ? "var(--text-hovered)" : "var(--text-unhovered)" }
+                ],
+                {
+                    duration: 400,
+                    easing: "ease",
+                    fill: "forwards"
+                }
+            );
+        });
+    });
+
+    link.addEventListener("mouseleave", () => {
+        navLinks.forEach(otherLink => {
+            // Skip animation if the link is active
+            if (otherLink.classList.contains("is_current")) return;
+            
+            const animation = otherLink.animate(
+                [
+                    { color: getComputedStyle(otherLink).color },
+                    { color: "var(--text-white)" }
+                ],
+                {
+                    duration: 1500,
+                    easing: "ease",
+                    fill: "forwards"
+                }
+            );
+        });
+    });
+});
+})();
+(()=>{
+const loginForm = document.querySelector(".login-form");
+// Form input field animations
+const formInputs = document.querySelectorAll(".form-input-field");
+
+// Helper function to run the animation
+function runAnimation(element, isEntering) {
+    if (!element.value) {
+        element.animate(
+            [
+                { 
+                    color: isEntering ? "var(--text-unhovered)" : "var(--text-hovered)",
+                    borderBottomColor: isEntering ? "var(--text-unhovered)" : "var(--text-hovered)"
+                },
+                { 
+                    color: isEntering ? "var(--text-hovered)" : "var(--text-unhovered)",
+                    borderBottomColor: isEntering ? "var(--text-hovered)" : "var(--text-unhovered)"
+                }
+            ],
+            {
+                duration: 300,
+                easing: "ease",
+                fill: "forwards"
+            }
+        );
+    }
+}
+
+formInputs.forEach(input => {
+    // Mouse hover
+    input.addEventListener("mouseenter", () => {
+        if (!input.value) {
+            runAnimation(input, true);
+        }
+    });
+
+    input.addEventListener("mouseleave", () => {
+        if (!input.value && !input.matches(":focus")) {
+            runAnimation(input, false);
+        }
+    });
+
+    // Focus/blur (click in/out)
+    input.addEventListener("focus", () => {
+        if (!input.value) {
+            runAnimation(input, true);
+        }
+    });
+
+    input.addEventListener("blur", () => {
+        if (!input.value) {
+            runAnimation(input, false);
+        }
+    });
+});
+
+// Form button animations
+const formBtn = document.querySelector(".form-btn");
+formBtn.addEventListener("mouseenter", () => {
+    formBtn.animate(
+        [
+            { color: "var(--text-unhovered)" },
+            { color: "var(--text-hovered)" }
+        ],
+        {
+            duration: 300,
+            easing: "ease",
+            fill: "forwards"
+        }
+    );
+});
+
+formBtn.addEventListener("mouseleave", () => {
+    formBtn.animate(
+        [
+            { color: "var(--text-hovered)" },
+            { color: "var(--text-unhovered)" }
+        ],
+        {
+            duration: 300,
+            easing: "ease",
+            fill: "forwards"
+        }
+    );
+});
+
+// Form divider animations
+const formDivider = document.querySelector(".form-devider");
+formDivider.addEventListener("mouseenter", () => {
+    formDivider.animate(
+        [
+            { borderBottomColor: "var(--text-unhovered)" },
+            { borderBottomColor: "var(--text-hovered)" }
+        ],
+        {
+            duration: 300,
+            easing: "ease",
+            fill: "forwards"
+        }
+    );
+});
+
+formDivider.addEventListener("mouseleave", () => {
+    formDivider.animate(
+        [
+            { borderBottomColor: "var(--text-hovered)" },
+            { borderBottomColor: "var(--text-unhovered)" }
+        ],
+        {
+            duration: 300,
+            easing: "ease",
+            fill: "forwards"
+        }
+    );
+});
+})();
\ No newline at end of file
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from benchmarks.fake_upstash import FakeUpstash
+from utils.resilience import CircuitBreaker
+from utils.storage import RedisBackend
+from utils.upstash import Upstash
+
+
+def error_reply(*_):
+    raise ValueError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+
+@pytest.fixture
+def fake():
+    server = FakeUpstash().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def store(fake):
+    store = Upstash(RedisBackend(fake.url, "token"))
+    store.breaker = CircuitBreaker(threshold=3, reset=60)
+    return store
+
+
+def test_server_errors_open_breaker(fake, store):
+    fake.fail_status = 503
+    for day in range(1, 4):
+        store.add_weight(80.0, f"2025-01-0{day}")
+    assert store.breaker.state == CircuitBreaker.OPEN
+
+    # Open breaker skips the backend
+    requests = fake.requests
+    store.add_weight(80.0, "2025-01-04")
+    assert fake.requests == requests
+
+
+def test_error_replies_do_not_open_breaker(fake, store):
+    fake.redis.cmd_hset = error_reply
+    for day in range(1, 6):
+        store.add_weight(80.0, f"2025-01-0{day}")
+    assert store.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_error_reply_does_not_close_breaker(fake, store):
+    store.breaker = CircuitBreaker(threshold=1, reset=0.1)
+    fake.fail_status = 502
+    store._call("add_weight", 80.0, "2025-01-01")
+    assert store.breaker.state == CircuitBreaker.OPEN
+
+    # The half open trial gets an error reply: the breaker stays half open and lets the next call try
+    time.sleep(0.1)
+    fake.fail_status = None
+    fake.redis.cmd_hset = error_reply
+    store._call("add_weight", 80.0, "2025-01-02")
+    assert store.breaker.state == CircuitBreaker.HALF_OPEN
+
+    del fake.redis.cmd_hset
+    store._call("add_weight", 80.0, "2025-01-03")
+    assert store.breaker.state == CircuitBreaker.CLOSED
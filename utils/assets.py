@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+from threading import Lock
+from typing import Final
+
+from utils.config import CFG
+from utils.images import VARIANT_MANIFEST
+
+
+STATIC_DIR: Final = os.path.join(CFG.dir.BASE, "static")
+TEMPLATES_DIR: Final = os.path.join(CFG.dir.BASE, "templates")
+VERSION_LENGTH: Final = 10
+# Files that change while the app runs: rendered charts rewrite the variant manifest
+RUNTIME_PATHS: Final = (VARIANT_MANIFEST, CFG.dir.WEIGHT, CFG.dir.CALORIES, CFG.dir.BOTH, CFG.dir.INSTA)
+
+_versions: dict[str, tuple[int, str]] = {}  # filename: (mtime, version)
+_versions_lock = Lock()
+_build_version: str | None = None
+
+
+def get_asset_version(filename: str) -> str | None:
+    """
+    Returns a short content hash of a static file, used as its ?v= fingerprint.
+    Hashes are cached per file and recomputed when the file mtime changes,
+    so re-rendered charts get a new URL. Returns None for missing files.
+    """
+    path = os.path.join(STATIC_DIR, filename)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    cached = _versions.get(filename)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, "rb") as file:
+        version = hashlib.sha1(file.read()).hexdigest()[:VERSION_LENGTH]
+    with _versions_lock:
+        _versions[filename] = (mtime, version)
+    return version
+
+
+def get_assets_version() -> str:
+    """
+    Returns a version of all templates and static files a page can link to.
+    Deployed files are hashed by size and mtime once per process, files that change
+    at runtime (RUNTIME_PATHS) are checked on every call.
+    """
+    global _build_version
+    if _build_version is None:
+        stats = []
+        for directory in (STATIC_DIR, TEMPLATES_DIR):
+            for root, _, files in sorted(os.walk(directory)):
+                for name in sorted(files):
+                    stat = os.stat(os.path.join(root, name))
+                    relative_path = os.path.relpath(os.path.join(root, name), CFG.dir.BASE)
+                    stats.append(f"{relative_path}:{stat.st_size}:{stat.st_mtime_ns}")
+        _build_version = hashlib.sha1("\n".join(stats).encode()).hexdigest()
+
+    runtime = [str(os.stat(path).st_mtime_ns) if os.path.exists(path) else "" for path in RUNTIME_PATHS]
+    return hashlib.sha1(":".join([_build_version, *runtime]).encode()).hexdigest()[:VERSION_LENGTH]
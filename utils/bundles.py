@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import re
+
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Final
+
+from markupsafe import Markup
+
+from utils.assets import STATIC_DIR, VERSION_LENGTH, get_asset_version
+from utils.logger import logger
+
+
+# Sheets every page uses, inlined into each page as one <style> block instead of blocking requests
+INLINE_SHARED_CSS: Final = [
+    "css/settings.css",
+    "css/styles.css",
+    "css/base.css",
+    "css/landing/landing.css",
+    "css/navigation.css",
+]
+# Page types with the CSS and JS they load after the shared CSS
+BUNDLES: Final = {
+    "landing": {"css": [], "js": ["js/base.js", "js/landing.js"]},
+    "home": {"css": ["css/home/home.css"], "js": ["js/base.js"]},
+    "graph": {"css": ["css/home/graph.css", "css/home/guess.css"], "js": ["js/base.js", "js/weight.js"]},
+    "insta": {"css": ["css/home/insta.css"], "js": ["js/base.js"]},
+    "admin": {"css": ["css/admin/admin.css"], "js": ["js/base.js", "js/admin.js"]},
+}
+BUNDLES_REL: Final = "bundles"
+BUNDLE_MANIFEST: Final = os.path.join(STATIC_DIR, BUNDLES_REL, "manifest.json")
+
+_manifest: dict[str, dict] = {}
+_manifest_mtime: float | None = None
+_manifest_lock = Lock()
+_inline_css: dict[str, Markup] = {}  # bundle path: inlined css
+
+
+@dataclass
+class PageAssets:
+    """The stylesheets and scripts of a page type, with the shared CSS to inline when bundled."""
+    inline_css: Markup | None = None
+    css: list[str] = field(default_factory=list)
+    js: list[str] = field(default_factory=list)
+
+
+def get_page_assets(name: str | None) -> PageAssets:
+    """
+    Returns the assets of a page type from the bundle manifest, or the unbundled
+    source files when the bundles were not built or a source changed since.
+    """
+    bundle = BUNDLES.get(name, {"css": [], "js": ["js/base.js"]})
+    built = _get_manifest().get(name)
+    if built is None or not _is_current(built):
+        return PageAssets(css=INLINE_SHARED_CSS + bundle["css"], js=bundle["js"])
+
+    return PageAssets(
+        inline_css=_read_inline_css(built["shared"]),
+        css=[built["css"]] if built.get("css") else [],
+        js=[built["js"]],
+    )
+
+
+def build_bundles() -> dict[str, dict]:
+    """
+    Writes a content hashed CSS (minified) and JS bundle per page type into static/bundles
+    plus the shared CSS bundle, and records their paths in the manifest.
+    Returns the manifest.
+    """
+    directory = os.path.join(STATIC_DIR, BUNDLES_REL)
+    os.makedirs(directory, exist_ok=True)
+    shared = _write_bundle("shared", "css", minify_css(_concat(INLINE_SHARED_CSS)))
+
+    manifest = {}
+    for name, bundle in BUNDLES.items():
+        manifest[name] = {
+            "shared": shared,
+            "css": _write_bundle(name, "css", minify_css(_concat(bundle["css"]))) if bundle["css"] else None,
+            "js": _write_bundle(name, "js", bundle_js(bundle["js"])),
+            "sources": {path: get_asset_version(path) for path in INLINE_SHARED_CSS + bundle["css"] + bundle["js"]},
+        }
+
+    # Remove bundles of earlier builds
+    current = {
+        os.path.basename(entry[kind])
+        for entry in manifest.values()
+        for kind in ("shared", "css", "js")
+        if entry[kind]
+    }
+    for filename in os.listdir(directory):
+        source = filename.removesuffix(".br").removesuffix(".gz")
+        if source.endswith((".css", ".js")) and source not in current:
+            os.remove(os.path.join(directory, filename))
+
+    with open(BUNDLE_MANIFEST, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    logger.info(f"Built {len(manifest)} page bundles")
+    return manifest
+
+
+def minify_css(css: str) -> str:
+    """Removes comments and insignificant whitespace from CSS."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # A space before ":" can be a descendant selector (.a :hover), only the one after is dropped
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def bundle_js(paths: list[str]) -> str:
+    """
+    Joins scripts into one, each wrapped in its own function scope so top level names
+    of different files cannot clash. Sources are kept as they are: line based stripping would
+    change template literals and multi-line strings, compression takes care of the size.
+    """
+    parts = []
+    for path in paths:
+        with open(os.path.join(STATIC_DIR, path), encoding="utf-8") as file:
+            source = file.read().strip()
+        if source:
+            parts.append(f"(()=>{{\n{source}\n}})();")
+    return "\n".join(parts)
+
+
+def _concat(paths: list[str]) -> str:
+    sources = []
+    for path in paths:
+        with open(os.path.join(STATIC_DIR, path), encoding="utf-8") as file:
+            sources.append(file.read())
+    return "\n".join(sources)
+
+
+def _write_bundle(name: str, extension: str, content: str) -> str:
+    """Writes a bundle under a content hashed name. Returns its static relative path."""
+    digest = hashlib.sha1(content.encode()).hexdigest()[:VERSION_LENGTH]
+    path = f"{BUNDLES_REL}/{name}.{digest}.{extension}"
+    with open(os.path.join(STATIC_DIR, path), "w", encoding="utf-8") as file:
+        file.write(content)
+    return path
+
+
+def _is_current(entry: dict) -> bool:
+    """Whether the bundles of a manifest entry exist and were built from the current sources."""
+    return (
+        all(get_asset_version(path) == version for path, version in entry["sources"].items())
+        and all(os.path.exists(os.path.join(STATIC_DIR, entry[kind]))
+                for kind in ("shared", "css", "js") if entry[kind])
+    )
+
+
+def _read_inline_css(path: str) -> Markup:
+    """Returns the shared CSS bundle, read once per build."""
+    css = _inline_css.get(path)
+    if css is None:
+        with open(os.path.join(STATIC_DIR, path), encoding="utf-8") as file:
+            # Closing tags cannot occur in valid CSS, guard the inline <style> anyway
+            css = Markup(file.read().replace("</", "<\\/"))
+        _inline_css[path] = css
+    return css
+
+
+def _get_manifest() -> dict[str, dict]:
+    """Returns the bundle manifest, reloaded when the file changed."""
+    global _manifest, _manifest_mtime
+    try:
+        mtime = os.path.getmtime(BUNDLE_MANIFEST)
+    except OSError:
+        return {}
+
+    if mtime != _manifest_mtime:
+        with _manifest_lock:
+            if mtime != _manifest_mtime:
+                try:
+                    with open(BUNDLE_MANIFEST) as file:
+                        _manifest = json.load(file)
+                except (OSError, ValueError):
+                    _manifest = {}
+                _manifest_mtime = mtime
+    return _manifest
@@ -0,0 +1,81 @@
+import time
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread safe LRU cache with a time to live per entry and hit/miss counters."""
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()  # key: (expires_at, value)
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value or default if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value even if expired, or default if missing. Does not count as a hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Caches value for ttl seconds, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, ttl: float, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value, calling loader and caching its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Removes a single entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Removes all entries whose key starts with prefix (or whose first item does, for tuple keys)."""
+        with self._lock:
+            for key in list(self._entries):
+                name = key[0] if isinstance(key, tuple) else key
+                if isinstance(name, str) and name.startswith(prefix):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns hit/miss counters and the current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import math
+import os
+
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+from typing import Final
+
+from utils.config import CFG
+from utils.images import build_image_variants, open_atomic
+from utils.logger import logger
+from utils.series import Series
+from utils.upstash import upstash
+
+
+CHART_KINDS: Final = ("weight", "calories", "both")
+# Render changed charts in the web process after admin writes. Needs requirements-build.txt and a writable
+# static/ directory, so it stays off on serverless deployments, which run manage.py render-charts at build time
+RENDER_ON_WRITE: Final = os.getenv("CHART_RENDER_ON_WRITE", "False") == "True"
+CHART_MANIFEST: Final = os.path.join(CFG.dir.BASE, "static", "images", "charts.json")
+
+# Style of the original hand made graphs
+BACKGROUND: Final = "#0e0d0d"
+FOREGROUND: Final = "#ffffff"
+WEIGHT_COLOR: Final = "#4a9eff"
+CALORIES_COLOR: Final = "#4cc47a"
+FIGURE_SIZE: Final = (10.42, 5.93)
+DPI: Final = 200
+
+# Inline SVG layout, same aspect ratio as the PNG charts
+SVG_WIDTH: Final = 1000
+SVG_HEIGHT: Final = 570
+SVG_MARGIN: Final = (30, 80, 70, 80)  # top, right, bottom, left
+SVG_TICKS: Final = 5
+
+_render_lock = Lock()
+
+
+def render_charts(force: bool = False) -> list[str]:
+    """
+    Renders the weight, calories and both graphs for all time, the last 30 days and every month
+    with data into CFG.dir.*. Charts whose data did not change since the last render are skipped.
+    Returns the relative paths of the rendered charts.
+    """
+    with _render_lock:
+        weights = dict(upstash.iter_weights())
+        calories = dict(upstash.iter_calories())
+        manifest = _load_manifest()
+        rendered = []
+
+        for suffix, start, end in get_chart_periods(weights, calories):
+            period_weights = {date: value for date, value in weights.items() if start <= date <= end}
+            period_calories = {date: value for date, value in calories.items() if start <= date <= end}
+
+            for kind in CHART_KINDS:
+                series = _get_kind_series(kind, period_weights, period_calories)
+                if not any(series.values()):
+                    continue
+
+                relative_path = f"{_get_relative_dir(kind)}/{kind}{suffix}.png"
+                path = os.path.join(CFG.dir.BASE, "static", relative_path)
+                digest = _get_digest(kind, series)
+                if not force and manifest.get(relative_path) == digest and os.path.exists(path):
+                    continue
+
+                render_chart(path, series)
+                manifest[relative_path] = digest
+                rendered.append(relative_path)
+
+        _save_manifest(manifest)
+        logger.info(f"Rendered {len(rendered)} charts")
+        if rendered:
+            build_image_variants(rendered)
+        return rendered
+
+
+def render_charts_in_background() -> None:
+    """Renders changed charts on a daemon thread, for use right after a write. Does nothing unless RENDER_ON_WRITE."""
+    if not RENDER_ON_WRITE:
+        return
+
+    def _render():
+        try:
+            render_charts()
+        except Exception as e:
+            logger.error(f"Error rendering charts: {e}")
+
+    Thread(target=_render, name="render-charts", daemon=True).start()
+
+
+def get_chart_periods(weights: dict[str, float],
+                      calories: dict[str, float]) -> list[tuple[str, str, str]]:
+    """Returns (file name suffix, start, end) for all time, the last 30 days and each month with data."""
+    dates = sorted(set(weights) | set(calories))
+    if not dates:
+        return []
+
+    today = datetime.now().date()
+    periods = [
+        ("", dates[0], dates[-1]),
+        ("_last_30", (today - timedelta(days=29)).isoformat(), today.isoformat()),
+    ]
+    for month in sorted({date[:7] for date in dates}):
+        first = datetime.strptime(month, "%Y-%m")
+        name = first.strftime("%B").lower()
+        periods.append((f"_{name}_{first.year}", f"{month}-01", f"{month}-31"))
+    return periods
+
+
+def render_chart(path: str, series: dict[str, dict[str, float]]) -> None:
+    """Renders one graph of {label: {date: value}} series to path, with a second axis for calories."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+
+    figure, weight_axis = plt.subplots(figsize=FIGURE_SIZE, dpi=DPI)
+    figure.patch.set_facecolor(BACKGROUND)
+    axes = {"Weight": weight_axis}
+    if series.get("Weight") and series.get("Calories"):
+        axes["Calories"] = weight_axis.twinx()
+    else:
+        axes = {label: weight_axis for label in series}
+
+    lines = []
+    for label, points in series.items():
+        if not points:
+            continue
+        axis = axes[label]
+        color = WEIGHT_COLOR if label == "Weight" else CALORIES_COLOR
+        dates = sorted(points)
+        x = [datetime.strptime(date, "%Y-%m-%d") for date in dates]
+        lines += axis.plot(x, [points[date] for date in dates], color=color, linewidth=2.5,
+                           marker="o", markersize=7, markeredgecolor=FOREGROUND, label=label)
+        axis.tick_params(axis="y", colors=color, labelsize=22)
+
+    weight_axis.set_facecolor(BACKGROUND)
+    weight_axis.grid(True, color=FOREGROUND, alpha=0.3)
+    weight_axis.tick_params(axis="x", colors=FOREGROUND, labelsize=22, labelrotation=45)
+    weight_axis.xaxis.set_major_formatter(mdates.DateFormatter("%d-%m"))
+    weight_axis.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=6))
+    for axis in set(axes.values()):
+        for spine in axis.spines.values():
+            spine.set_color(FOREGROUND)
+    if len(lines) > 1:
+        legend = weight_axis.legend(handles=lines, loc="lower right", fontsize=24,
+                                    facecolor=BACKGROUND, edgecolor=FOREGROUND)
+        for text in legend.get_texts():
+            text.set_color(FOREGROUND)
+
+    figure.tight_layout()
+    with open_atomic(path) as file:
+        figure.savefig(file, format="png", facecolor=BACKGROUND)
+    plt.close(figure)
+
+
+def render_svg(series: dict[str, Series]) -> str | None:
+    """
+    Renders {label: Series} as a compact inline SVG in the style of the PNG charts,
+    with a second axis for calories. Returns None when no series has a value.
+    """
+    points = {label: list(values.items()) for label, values in series.items()}
+    points = {label: items for label, items in points.items() if items}
+    if not points:
+        return None
+
+    top, right, bottom, left = SVG_MARGIN
+    plot_width = SVG_WIDTH - left - right
+    plot_height = SVG_HEIGHT - top - bottom
+    days = max(len(values) for values in series.values())
+    start = min(values.start for values in series.values())
+
+    def x_of(date: str) -> float:
+        index = (datetime.strptime(date, "%Y-%m-%d").date() - start).days
+        return left + plot_width * (index / (days - 1) if days > 1 else 0.5)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" '
+        f'class="graph-image" role="img" aria-label="Progress Graph" '
+        f'font-family="sans-serif" font-size="22">',
+        f'<rect width="{SVG_WIDTH}" height="{SVG_HEIGHT}" fill="{BACKGROUND}"/>',
+    ]
+
+    # Y axes, weight on the left and calories on the right when both are drawn
+    for i, (label, items) in enumerate(points.items()):
+        color = WEIGHT_COLOR if label == "Weight" else CALORIES_COLOR
+        ticks = _get_ticks([value for _, value in items])
+        low, high = ticks[0], ticks[-1]
+
+        def y_of(value: float) -> float:
+            return top + plot_height * (1 - (value - low) / (high - low))
+
+        axis_x, anchor = (left - 10, "end") if i == 0 else (SVG_WIDTH - right + 10, "start")
+        for tick in ticks:
+            y = y_of(tick)
+            if i == 0:
+                parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{SVG_WIDTH - right}" y2="{y:.1f}" '
+                             f'stroke="{FOREGROUND}" stroke-opacity="0.3"/>')
+            parts.append(f'<text x="{axis_x}" y="{y + 8:.1f}" fill="{color}" '
+                         f'text-anchor="{anchor}">{_format_tick(tick)}</text>')
+
+        coordinates = " ".join(f"{x_of(date):.1f},{y_of(value):.1f}" for date, value in items)
+        parts.append(f'<polyline points="{coordinates}" fill="none" stroke="{color}" stroke-width="2.5"/>')
+        parts.extend(f'<circle cx="{x_of(date):.1f}" cy="{y_of(value):.1f}" r="5" fill="{color}" '
+                     f'stroke="{FOREGROUND}"><title>{date}: {_format_tick(value)}</title></circle>'
+                     for date, value in items)
+
+    # X axis, about six day labels
+    step = max(math.ceil(days / 6), 1)
+    for index in range(0, days, step):
+        date = (start + timedelta(days=index)).isoformat()
+        x = x_of(date)
+        parts.append(f'<text x="{x:.1f}" y="{SVG_HEIGHT - bottom + 32}" fill="{FOREGROUND}" '
+                     f'text-anchor="middle">{date[8:]}-{date[5:7]}</text>')
+
+    parts.append(f'<rect x="{left}" y="{top}" width="{plot_width}" height="{plot_height}" '
+                 f'fill="none" stroke="{FOREGROUND}"/>')
+    if len(points) > 1:
+        for i, label in enumerate(points):
+            color = WEIGHT_COLOR if label == "Weight" else CALORIES_COLOR
+            y = SVG_HEIGHT - bottom - 60 + i * 30
+            parts.append(f'<rect x="{SVG_WIDTH - right - 160}" y="{y - 12}" width="24" height="4" fill="{color}"/>')
+            parts.append(f'<text x="{SVG_WIDTH - right - 126}" y="{y - 2}" fill="{FOREGROUND}">{label}</text>')
+
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def _get_ticks(values: list[float]) -> list[float]:
+    """Returns about SVG_TICKS evenly spaced round tick values covering values."""
+    low, high = min(values), max(values)
+    if low == high:
+        low, high = low - 1, high + 1
+    raw_step = (high - low) / (SVG_TICKS - 1)
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    first = math.floor(low / step) * step
+    count = math.ceil((high - first) / step) + 1
+    return [round(first + i * step, 6) for i in range(count)]
+
+
+def _format_tick(value: float) -> str:
+    """Formats a value without a trailing .0."""
+    return f"{value:g}"
+
+
+def _get_kind_series(kind: str,
+                     weights: dict[str, float],
+                     calories: dict[str, float]) -> dict[str, dict[str, float]]:
+    """Returns the series drawn on a chart kind."""
+    if kind == "weight":
+        return {"Weight": weights}
+    if kind == "calories":
+        return {"Calories": calories}
+    return {"Weight": weights, "Calories": calories}
+
+
+def _get_relative_dir(kind: str) -> str:
+    """Returns the static relative image directory of a chart kind."""
+    return {
+        "weight": CFG.dir.WEIGHT_REL,
+        "calories": CFG.dir.CALORIES_REL,
+        "both": CFG.dir.BOTH_REL,
+    }[kind]
+
+
+def _get_digest(kind: str, series: dict[str, dict[str, float]]) -> str:
+    """Returns a hash of the data drawn on a chart."""
+    data = json.dumps([kind, series], sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def _load_manifest() -> dict[str, str]:
+    try:
+        with open(CHART_MANIFEST) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest: dict[str, str]) -> None:
+    with open_atomic(CHART_MANIFEST, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
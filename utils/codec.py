@@ -0,0 +1,90 @@
+import json
+
+from typing import Final
+
+
+CODEC_VERSION: Final = 1
+
+
+def encode_training(date: str, duration: int | float | str, exercises: list[dict]) -> str:
+    """
+    Encodes a training as compact versioned JSON:
+    {"v":1,"d":"YYYY-MM-DD","t":duration,"e":[[name,reps],...]}
+    """
+    record = {
+        "v": CODEC_VERSION,
+        "d": date,
+        "t": _to_number(duration),
+        "e": [[exercise["name"], _to_number(exercise["reps"])] for exercise in exercises],
+    }
+    return _dumps(record)
+
+
+def decode_training(data: str) -> dict:
+    """Decodes a JSON or legacy pipe delimited training into a dict of date, duration and exercises."""
+    if not is_legacy(data):
+        record = json.loads(data)
+        return {
+            "date": record["d"],
+            "duration": record["t"],
+            "exercises": [{"name": name, "reps": reps} for name, reps in record["e"]],
+        }
+
+    # Legacy format: YYYY-MM-DD|duration|exercise_name|reps|exercise_name|reps|...
+    data_parts = data.split("|")
+
+    # Date and duration
+    workout_date = data_parts[0] if len(data_parts) > 0 else ""
+    duration = data_parts[1] if len(data_parts) > 1 else ""
+
+    # Exercises and reps
+    exercises = []
+    for i in range(2, len(data_parts), 2):
+        if i + 1 < len(data_parts):
+            exercise_name = data_parts[i]
+            reps = data_parts[i + 1]
+            exercises.append({"name": exercise_name, "reps": _to_number(reps)})
+
+    return {
+        "date": workout_date,
+        "duration": _to_number(duration),
+        "exercises": exercises
+    }
+
+
+def encode_weight_guess(date: str, weight: float) -> str:
+    """Encodes a weight guess as compact versioned JSON: {"v":1,"d":"YYYY-MM-DD","w":weight}"""
+    return _dumps({"v": CODEC_VERSION, "d": date, "w": float(weight)})
+
+
+def decode_weight_guess(data: str) -> tuple[str, float]:
+    """Decodes a JSON or legacy date|weight guess into (date, weight)."""
+    if not is_legacy(data):
+        record = json.loads(data)
+        return record["d"], float(record["w"])
+
+    date_str, weight_str = data.split("|")
+    return date_str, float(weight_str)
+
+
+def is_legacy(data: str) -> bool:
+    """Whether data is in the legacy pipe delimited format."""
+    return not data.startswith("{")
+
+
+def _dumps(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+
+
+def _to_number(value: int | float | str) -> int | float | str:
+    """Returns value as int or float when it is numeric, else unchanged."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
@@ -0,0 +1,151 @@
+import gzip
+import json
+import os
+import zlib
+
+from threading import Lock
+from typing import Final, Iterable, Iterator
+
+from utils.assets import STATIC_DIR, get_asset_version
+from utils.logger import logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Static files that get .br/.gz siblings from the build step
+COMPRESSED_EXTENSIONS: Final = (".css", ".js", ".svg")
+COMPRESSED_MANIFEST: Final = os.path.join(STATIC_DIR, "compressed.json")
+# Encodings in order of preference with the extension of their precompressed siblings
+ENCODINGS: Final = {"br": ".br", "gzip": ".gz"}
+# Dynamic responses: cheap levels, small bodies are not worth the CPU
+DYNAMIC_MIMETYPES: Final = (
+    "text/html", "text/css", "text/csv", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+)
+DYNAMIC_MIN_SIZE: Final = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+DYNAMIC_GZIP_LEVEL: Final = 5
+DYNAMIC_BROTLI_QUALITY: Final = 4
+
+_manifest: dict[str, str] = {}
+_manifest_mtime: float | None = None
+_manifest_lock = Lock()
+
+
+def get_encodings() -> list[str]:
+    """Returns the supported content encodings in order of preference."""
+    return [encoding for encoding in ENCODINGS if encoding != "br" or brotli is not None]
+
+
+def build_compressed_assets(force: bool = False) -> list[str]:
+    """
+    Writes brotli (quality 11) and gzip (level 9) siblings of the static text assets
+    and records the content version they were built from in the manifest.
+    Files whose content did not change since the last build are skipped.
+    Returns the static relative paths that were compressed.
+    """
+    filenames = _get_compressible_files()
+    # Drop entries of removed files, such as bundles of an earlier build
+    manifest = {filename: version for filename, version in _read_manifest().items() if filename in filenames}
+    built = []
+    for filename in filenames:
+        version = get_asset_version(filename)
+        if not force and manifest.get(filename) == version:
+            continue
+
+        path = os.path.join(STATIC_DIR, filename)
+        with open(path, "rb") as file:
+            data = file.read()
+        if brotli is not None:
+            _write(path + ENCODINGS["br"], brotli.compress(data, quality=11))
+        _write(path + ENCODINGS["gzip"], gzip.compress(data, compresslevel=9, mtime=0))
+        manifest[filename] = version
+        built.append(filename)
+
+    if built or manifest != _read_manifest():
+        with open(COMPRESSED_MANIFEST, "w") as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+    logger.info(f"Compressed {len(built)} static files")
+    return built
+
+
+def get_compressed_path(filename: str, encoding: str) -> str | None:
+    """
+    Returns the path of the precompressed sibling of a static file for encoding,
+    None when it is missing or was built from other content.
+    """
+    version = _get_manifest().get(filename)
+    if version is None or version != get_asset_version(filename):
+        return None
+    path = os.path.join(STATIC_DIR, filename + ENCODINGS[encoding])
+    return path if os.path.exists(path) else None
+
+
+def has_compressed_siblings(filename: str) -> bool:
+    """Whether precompressed siblings of a static file were built from its current content."""
+    version = _get_manifest().get(filename)
+    return version is not None and version == get_asset_version(filename)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compresses a dynamic response body with a cheap level."""
+    if encoding == "br":
+        return brotli.compress(data, quality=DYNAMIC_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=DYNAMIC_GZIP_LEVEL)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compresses a streamed response chunk by chunk, flushing after each so data is sent as it comes."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=DYNAMIC_BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    # wbits 16 + MAX_WBITS writes a gzip header and trailer
+    compressor = zlib.compressobj(DYNAMIC_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _get_compressible_files() -> list[str]:
+    """Returns the static relative paths of all files with a COMPRESSED_EXTENSIONS extension."""
+    filenames = []
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in files:
+            if name.endswith(COMPRESSED_EXTENSIONS):
+                filenames.append(os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, "/"))
+    return sorted(filenames)
+
+
+def _get_manifest() -> dict[str, str]:
+    """Returns the compressed manifest, reloaded when the file changed."""
+    global _manifest, _manifest_mtime
+    try:
+        mtime = os.path.getmtime(COMPRESSED_MANIFEST)
+    except OSError:
+        return {}
+
+    if mtime != _manifest_mtime:
+        with _manifest_lock:
+            if mtime != _manifest_mtime:
+                _manifest = _read_manifest()
+                _manifest_mtime = mtime
+    return _manifest
+
+
+def _read_manifest() -> dict[str, str]:
+    try:
+        with open(COMPRESSED_MANIFEST) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, "wb") as file:
+        file.write(data)
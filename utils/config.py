@@ -1,7 +1,7 @@
-import argparse
 import os
 
 from dataclasses import dataclass, field
+from functools import cached_property
 
 
 @dataclass
@@ -11,11 +11,13 @@ class Directories:
     CALORIES: str = field(init=False)
     BOTH: str = field(init=False)
     INSTA: str = field(init=False)
+    VARIANTS: str = field(init=False)
 
     WEIGHT_REL: str = field(init=False)
     CALORIES_REL: str = field(init=False)
     BOTH_REL: str = field(init=False)
     INSTA_REL: str = field(init=False)
+    VARIANTS_REL: str = field(init=False)
 
     def __post_init__(self):
         image_base = os.path.join(self.BASE, "static")
@@ -23,11 +25,13 @@ class Directories:
         self.CALORIES = os.path.join(image_base, "images", "calories")
         self.BOTH = os.path.join(image_base, "images", "both")
         self.INSTA = os.path.join(image_base, "images", "insta")
+        self.VARIANTS = os.path.join(image_base, "images", "variants")
 
         self.WEIGHT_REL = "images/weight"
         self.CALORIES_REL = "images/calories"
         self.BOTH_REL = "images/both"
         self.INSTA_REL = "images/insta"
+        self.VARIANTS_REL = "images/variants"
 
 
 @dataclass
@@ -102,12 +106,16 @@ class Routes:
 
     add_user: str = "/admin/add-user"
     add_weight: str = "/admin/add-weight"
+    import_weights: str = "/admin/import-weights"
+    export_weights: str = "/admin/export-weights"
+    metrics: str = "/admin/metrics"
 
 
 @dataclass
 class Templates:
     landing: str = "landing/landing.html"
     home: str = "home/home.html"
+    training: str = "home/training.html"
     graph: str = "home/graph.html"
     weight: str = "home/weight.html"
     calories: str = "home/calories.html"
@@ -116,6 +124,7 @@ class Templates:
 
     add_user: str = "admin/add_user.html"
     add_weight: str = "admin/add_weight.html"
+    import_weights: str = "admin/import_weights.html"
 
 
 @dataclass
@@ -129,26 +138,22 @@ class Redirects:
     
     add_user: str = "admin.add_user"
     add_weight: str = "admin.add_weight"
+    import_weights: str = "admin.import_weights"
+    export_weights: str = "admin.export_weights"
+    metrics: str = "admin.metrics"
 
 
 @dataclass
 class Config:
-    server: Server | LocalServer = None
     route: Routes = field(default_factory=Routes)
     template: Templates = field(default_factory=Templates)
     redirect: Redirects = field(default_factory=Redirects)
     dir: Directories = field(default_factory=Directories)
 
-    def __post_init__(self):
-        if self.server is None:
-            parser = argparse.ArgumentParser(description="Run the Flask application")
-            parser.add_argument("--local", action="store_true", default=False, help="Run the application in debug mode")
-            args = parser.parse_args()
-            debug = args.local
-
-            # Check if localhost
-            is_local = os.environ.get("DEBUG") == "True" or debug
-            self.server = LocalServer() if is_local else Server()
+    @cached_property
+    def server(self) -> Server | LocalServer:
+        """Server settings, read from the environment on first use: LocalServer when DEBUG=True."""
+        return LocalServer() if os.getenv("DEBUG") == "True" else Server()
 
 
 CFG = Config()
@@ -0,0 +1,121 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+
+from threading import BoundedSemaphore
+from typing import Final
+
+from utils.cache import TTLCache
+from utils.metrics import metrics
+from utils.timing import timed
+
+
+# scrypt cost: memory is 128 * r * n bytes per hash (16 MiB by default), time grows linearly with n * r * p
+# Stored hashes keep their own parameters, changed settings are applied on the next login of each user
+SCRYPT_N: Final = int(os.getenv("SCRYPT_N", 2 ** 14))
+SCRYPT_R: Final = int(os.getenv("SCRYPT_R", 8))
+SCRYPT_P: Final = int(os.getenv("SCRYPT_P", 1))
+SALT_SIZE: Final = 16
+KEY_SIZE: Final = 32
+# Hashes running at once per process, caps the CPU and memory logins can take from other requests
+HASH_WORKERS: Final = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+# Seconds a verified password is accepted without hashing it again
+VERIFIED_TTL: Final = int(os.getenv("CACHE_TTL_CREDENTIALS", 300))
+PREFIX: Final = "scrypt"
+# Hashed for unknown usernames, so they take as long to reject as a wrong password
+DUMMY_SALT: Final = bytes(SALT_SIZE)
+
+# Cached passwords are kept as HMACs under a key that never leaves the process
+_cache_key = secrets.token_bytes(32)
+_verified = TTLCache(max_size=int(os.getenv("CACHE_SIZE", 1024)))  # username: (stored hash, password HMAC)
+metrics.register_cache("credentials", _verified)
+_hash_slots = BoundedSemaphore(HASH_WORKERS)
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int, size: int = KEY_SIZE) -> bytes:
+    """
+    Derives the key in the calling thread, waiting for a free slot while HASH_WORKERS hashes (and their
+    memory) are running. hashlib releases the GIL, so other request threads keep running meanwhile.
+    """
+    # OpenSSL refuses to use more than 32 MiB unless allowed, this is what the parameters need
+    maxmem = 128 * r * (n + p + 2)
+    with timed("scrypt"), _hash_slots:
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=size)
+
+
+def _encode(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _get_mac(password: str) -> bytes:
+    return hmac.digest(_cache_key, password.encode(), "sha256")
+
+
+def hash_password(password: str) -> str:
+    """Returns scrypt$n$r$p$salt$key, salt and key base64 encoded."""
+    salt = secrets.token_bytes(SALT_SIZE)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_encode(salt)}${_encode(key)}"
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(f"{PREFIX}$")
+
+
+def needs_rehash(stored: str) -> bool:
+    """Whether stored is a legacy plain text password or was hashed with other cost parameters."""
+    if not is_hashed(stored):
+        return True
+    _, n, r, p, _, _ = stored.split("$")
+    return (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+def verify_password(username: str, password: str, stored: str | None) -> bool:
+    """
+    Checks password against the stored hash (or legacy plain text) of username. A verified
+    password is remembered for VERIFIED_TTL seconds, repeated logins then cost one HMAC instead of a hash.
+    Changing the stored hash invalidates the remembered password.
+    """
+    if stored is None:
+        # Same cost as a wrong password, the response time must not tell which usernames exist
+        _scrypt(password, DUMMY_SALT, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return False
+
+    mac = _get_mac(password)
+    cached = _verified.get(username)
+    if cached is not None and cached[0] == stored and hmac.compare_digest(cached[1], mac):
+        return True
+
+    if is_hashed(stored):
+        try:
+            _, n, r, p, salt, key = stored.split("$")
+            expected = base64.b64decode(key)
+            derived = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p), len(expected))
+            valid = hmac.compare_digest(derived, expected)
+        except ValueError:
+            return False
+    else:
+        valid = hmac.compare_digest(stored.encode(), password.encode())
+
+    if valid:
+        remember(username, password, stored)
+    return valid
+
+
+def remember(username: str, password: str, stored: str) -> None:
+    """Marks password as verified against stored, e.g. after rehashing it."""
+    _verified.set(username, (stored, _get_mac(password)), VERIFIED_TTL)
+
+
+def clear_verified() -> None:
+    """Forgets all verified passwords, the next login of each user is hashed again."""
+    _verified.clear()
+
+
+def after_fork() -> None:
+    """Slots held by threads of a preloading parent process would never be released in its workers."""
+    global _hash_slots
+    _hash_slots = BoundedSemaphore(HASH_WORKERS)
+    clear_verified()
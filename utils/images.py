@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import IO, Final, Iterator
+
+from utils.config import CFG
+from utils.logger import logger
+
+
+# Widths of the generated variants, widths close to or above the original are skipped
+VARIANT_WIDTHS: Final = (480, 960, 1440)
+# Formats in order of preference, with their Pillow save options
+VARIANT_FORMATS: Final = {
+    "avif": {"quality": 55, "speed": 6},
+    "webp": {"quality": 80, "method": 6},
+}
+VARIANT_MANIFEST: Final = os.path.join(CFG.dir.VARIANTS, "manifest.json")
+
+_manifest: dict[str, dict] = {}
+_manifest_mtime: float | None = None
+_manifest_lock = Lock()
+
+
+@dataclass
+class Picture:
+    """An image with its fallback src and the srcset of each variant format."""
+    src: str
+    width: int | None = None
+    height: int | None = None
+    sources: list[tuple[str, list[tuple[str, int]]]] = field(default_factory=list)  # (mime type, [(path, width)])
+
+
+def build_image_variants(paths: list[str] | None = None, force: bool = False) -> list[str]:
+    """
+    Writes AVIF and WebP variants in VARIANT_WIDTHS of the PNGs under CFG.dir.* (or the
+    given static relative paths) into CFG.dir.VARIANTS and records them in the manifest.
+    Images whose PNG content did not change since the last build are skipped.
+    Returns the relative paths of the images that were built.
+    """
+    from PIL import Image
+
+    manifest = _read_manifest()
+    built = []
+    for relative_path in paths if paths is not None else _get_source_images():
+        source = os.path.join(CFG.dir.BASE, "static", relative_path)
+        digest = _get_digest(source)
+        entry = manifest.get(relative_path)
+        if not force and entry and entry["digest"] == digest:
+            continue
+
+        with Image.open(source) as image:
+            image.load()
+            width, height = image.size
+            entry = {"digest": digest, "width": width, "height": height, "variants": {}}
+            widths = [w for w in VARIANT_WIDTHS if w < width * 0.8] + [width]
+
+            for format, options in VARIANT_FORMATS.items():
+                variants = []
+                for variant_width in widths:
+                    variant_path = _get_variant_path(relative_path, variant_width, format)
+                    resized = image if variant_width == width else image.resize(
+                        (variant_width, round(height * variant_width / width)), Image.LANCZOS)
+                    target = os.path.join(CFG.dir.BASE, "static", variant_path)
+                    with open_atomic(target) as file:
+                        resized.save(file, format=format.upper(), **options)
+                    variants.append([variant_path, variant_width])
+                entry["variants"][format] = variants
+
+        manifest[relative_path] = entry
+        built.append(relative_path)
+
+    if built:
+        _write_manifest(manifest)
+    logger.info(f"Built image variants for {len(built)} images")
+    return built
+
+
+@contextmanager
+def open_atomic(path: str, mode: str = "wb") -> Iterator[IO]:
+    """
+    Opens a temporary file next to path that replaces path when the block succeeds. Readers
+    (and other processes writing the same file) never see a partially written file.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        os.chmod(temp_path, 0o644)
+        with os.fdopen(fd, mode) as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def get_picture(relative_path: str) -> Picture:
+    """Returns the Picture of a static relative PNG path, without sources when it has no variants."""
+    entry = _get_manifest().get(relative_path)
+    if entry is None:
+        return Picture(relative_path)
+
+    sources = []
+    for format in VARIANT_FORMATS:
+        variants = entry["variants"].get(format)
+        if variants:
+            sources.append((f"image/{format}", [(path, width) for path, width in variants]))
+    return Picture(relative_path, entry["width"], entry["height"], sources)
+
+
+def _get_source_images() -> list[str]:
+    """Returns the static relative paths of all PNGs in the image directories."""
+    paths = []
+    for relative_dir in (CFG.dir.WEIGHT_REL, CFG.dir.CALORIES_REL, CFG.dir.BOTH_REL, CFG.dir.INSTA_REL):
+        directory = os.path.join(CFG.dir.BASE, "static", relative_dir)
+        paths.extend(f"{relative_dir}/{name}" for name in sorted(os.listdir(directory))
+                     if name.endswith(".png"))
+    return paths
+
+
+def _get_digest(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def _get_variant_path(relative_path: str, width: int, format: str) -> str:
+    """Returns the static relative path of a variant: images/insta/x.png -> images/variants/insta/x-480.webp"""
+    directory, name = os.path.split(relative_path)
+    kind = directory.split("/")[-1]
+    return f"{CFG.dir.VARIANTS_REL}/{kind}/{name[:-len('.png')]}-{width}.{format}"
+
+
+def _get_manifest() -> dict[str, dict]:
+    """Returns the variant manifest, reloaded when the file changed."""
+    global _manifest, _manifest_mtime
+    try:
+        mtime = os.path.getmtime(VARIANT_MANIFEST)
+    except OSError:
+        return {}
+
+    if mtime != _manifest_mtime:
+        with _manifest_lock:
+            if mtime != _manifest_mtime:
+                _manifest = _read_manifest()
+                _manifest_mtime = mtime
+    return _manifest
+
+
+def _read_manifest() -> dict[str, dict]:
+    try:
+        with open(VARIANT_MANIFEST) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest: dict[str, dict]) -> None:
+    with open_atomic(VARIANT_MANIFEST, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
@@ -1,7 +1,20 @@
+import json
+import os
 import sys
 
+from typing import Final
+
 from loguru import logger as loguru_logger
 
+from utils.timing import TIMING_ENABLED
+
+
+# pretty: colorized lines written synchronously (local development)
+# json: one JSON object per line, serialized and written by a background thread
+LOG_FORMAT: Final = os.getenv("LOG_FORMAT", "pretty").lower()
+# json mode keeps the TIMING lines (level 15, below INFO) when REQUEST_TIMING is enabled
+LOG_LEVEL: Final = os.getenv(
+    "LOG_LEVEL", "TRACE" if LOG_FORMAT == "pretty" else "TIMING" if TIMING_ENABLED else "INFO").upper()
 
 logger = loguru_logger
 custom_format = (
@@ -10,16 +23,48 @@ custom_format = (
     "<level>{message}</level>"
 )
 
-logger.remove()
-logger.add(sys.stderr,
-           level="TRACE",
-           format=custom_format,
-           colorize=True)
 
+def _json_sink(message) -> None:
+    """
+    Writes a record as one JSON line, bound extra fields included. Runs on loguru's queue thread,
+    the request thread only formats "{message}" (and the traceback of exceptions) and queues the record.
+    """
+    record = message.record
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "source": f"{record['file'].name}:{record['function']}:{record['line']}",
+        "process": record["process"].id,
+    }
+    if record["extra"]:
+        entry["extra"] = record["extra"]
+    if record["exception"] is not None:
+        # The queued record has no traceback, loguru appended its formatted text to the message
+        entry["exception"] = str(message)[len(record["message"]) + 1:]
+    sys.stderr.write(json.dumps(entry, default=str) + "\n")
+
+
+logger.remove()
 # Add custom levels
-logger.timing = lambda message: logger.opt(depth=1).log("TIMING", message)
+logger.level("TIMING", no=15, color="<fg 200,0,250>")  # purple/pink
+
+if LOG_FORMAT == "json":
+    logger.add(_json_sink,
+               level=LOG_LEVEL,
+               format="{message}",
+               colorize=False,
+               enqueue=True)
+else:
+    logger.add(sys.stderr,
+               level=LOG_LEVEL,
+               format=custom_format,
+               colorize=True)
+
+# Keyword arguments are bound as structured extra fields: logger.timing("...", timings={...})
+# Positional arguments are formatted into the message only when the record is emitted: logger.timing("{} ms", ms)
+logger.timing = lambda message, *args, **extra: logger.bind(**extra).opt(depth=1).log("TIMING", message, *args)
 
 # Add custom colors
-logger.level("TIMING", no=15, color="<fg 200,0,250>")  # purple/pink
 logger.level("INFO", color="<fg 255,165,0>")           # orange
 logger.level("WARNING", color="<fg 235,235,0>")        # brighter yellow
@@ -0,0 +1,144 @@
+from threading import Lock, local
+from typing import TYPE_CHECKING, Callable, Final
+
+if TYPE_CHECKING:
+    from utils.cache import TTLCache
+
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS: Final = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS: Final = "progress_http_requests_total"
+REQUEST_DURATION: Final = "progress_http_request_duration_seconds"
+STORAGE_CALLS: Final = "progress_storage_calls_total"
+STORAGE_ERRORS: Final = "progress_storage_errors_total"
+STORAGE_FALLBACKS: Final = "progress_storage_fallbacks_total"
+STORAGE_DURATION: Final = "progress_storage_duration_seconds"
+
+# name: (type, help, label names)
+METRICS: Final = {
+    REQUESTS: ("counter", "Requests by endpoint, method and status.", ("endpoint", "method", "status")),
+    REQUEST_DURATION: ("histogram", "Request latency by endpoint.", ("endpoint",)),
+    STORAGE_CALLS: ("counter", "Storage calls by operation.", ("operation",)),
+    STORAGE_ERRORS: ("counter", "Storage calls that failed after retries.", ("operation",)),
+    STORAGE_FALLBACKS: ("counter", "Storage calls answered by the memory fallback.", ("operation",)),
+    STORAGE_DURATION: ("histogram", "Storage call latency by operation, retries included.", ("operation",)),
+}
+
+
+class Metrics:
+    """
+    Counters and histograms of one process, in the Prometheus text format.
+    Every thread writes to its own shard, so recording takes no lock. Shards are
+    summed when the metrics are rendered. Each gunicorn worker reports its own numbers.
+    """
+    def __init__(self):
+        self._shards: list[dict[tuple, list]] = []  # (name, labels): value
+        self._local = local()
+        self._lock = Lock()
+        self._caches: dict[str, "TTLCache"] = {}
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}  # name: (help, value)
+
+    def _get_shard(self) -> dict[tuple, list]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, *labels: str) -> None:
+        """Adds one to a counter."""
+        shard = self._get_shard()
+        value = shard.get((name, labels))
+        if value is None:
+            shard[(name, labels)] = [1]
+        else:
+            value[0] += 1
+
+    def observe(self, name: str, seconds: float, *labels: str) -> None:
+        """Records a duration in a histogram: [count per bucket..., +Inf count, sum]."""
+        shard = self._get_shard()
+        value = shard.get((name, labels))
+        if value is None:
+            value = shard[(name, labels)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                value[i] += 1
+                break
+        else:
+            value[len(LATENCY_BUCKETS)] += 1
+        value[-1] += seconds
+
+    def register_cache(self, name: str, cache: "TTLCache") -> None:
+        """Reports hits, misses, hit ratio and size of a cache."""
+        self._caches[name] = cache
+
+    def register_gauge(self, name: str, help: str, value: Callable[[], float]) -> None:
+        """Reports value() when the metrics are rendered."""
+        self._gauges[name] = (help, value)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        totals: dict[tuple, list] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # dict.copy is atomic, iterating a shard another thread writes to is not
+            for key, value in shard.copy().items():
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(value)
+                else:
+                    totals[key] = [a + b for a, b in zip(total, value)]
+
+        lines = []
+        for name, (kind, help, label_names) in METRICS.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for (metric, labels), value in sorted(totals.items()):
+                if metric != name:
+                    continue
+                label_pairs = list(zip(label_names, labels))
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(label_pairs)} {value[0]}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(label_pairs + [('le', str(bound))])} {cumulative}")
+                count = cumulative + value[len(LATENCY_BUCKETS)]
+                lines.append(f"{name}_bucket{_format_labels(label_pairs + [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(label_pairs)} {value[-1]:.6f}")
+                lines.append(f"{name}_count{_format_labels(label_pairs)} {count}")
+
+        lines += _render_caches(self._caches)
+        for name, (help, value) in self._gauges.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value()}"]
+        return "\n".join(lines) + "\n"
+
+
+def _render_caches(caches: dict[str, "TTLCache"]) -> list[str]:
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    lines = []
+    for key, kind, help in (
+        ("hits", "counter", "Cache hits."),
+        ("misses", "counter", "Cache misses, expired entries included."),
+        ("hit_ratio", "gauge", "Share of cache reads that were hits."),
+        ("size", "gauge", "Cached entries."),
+    ):
+        name = f"progress_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache}"}} {values[key]}' for cache, values in stats.items()]
+    return lines
+
+
+def _format_labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+metrics = Metrics()
@@ -1,9 +1,19 @@
+import hashlib
 import os
+import time
 
-from flask import session, redirect, url_for, flash, request
+from datetime import date
+from flask import session, redirect, url_for, flash, request, make_response
 from functools import wraps
+from typing import Final
 
+from utils.assets import get_assets_version
 from utils.config import CFG
+from utils.upstash import upstash
+
+
+# Flask-WTF tokens expire after an hour, cached pages with forms must be re-rendered before that
+CSRF_BUCKET_SECONDS: Final = 1800
 
 
 def login_required(f):
@@ -32,3 +42,48 @@ def admin_required(f):
             return redirect(url_for(CFG.redirect.home))
         return f(*args, **kwargs)
     return decorated_function
+
+
+def conditional(*kinds: str):
+    """
+    Answers GET requests with 304 Not Modified, without running the view, when the page ETag
+    still matches If-None-Match. The ETag covers the user, the url, the data versions of kinds
+    (see utils.upstash.DATA_VERSIONS), the templates and static files, the day, a CSRF
+    token bucket and the session's CSRF token. Pages with pending flashes or form errors are always rendered.
+    The ETag is always weak and the 304 varies on Accept-Encoding like the (compressed) 200 it stands for.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != "GET" or session.get("_flashes") or session.get("form_errors"):
+                return f(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(get_page_etag(kinds)):
+                response = make_response("", 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            # After rendering, a session that just got its CSRF token is covered by the ETag
+            response.set_etag(get_page_etag(kinds), weak=True)
+            response.vary.add("Accept-Encoding")
+            return response
+        return decorated_function
+    return decorator
+
+
+def get_page_etag(kinds: tuple[str, ...]) -> str:
+    """Returns the ETag of the current page, see conditional."""
+    versions = upstash.get_versions()
+    parts = [
+        request.endpoint,
+        request.full_path,
+        session.get("username", ""),
+        *(f"{kind}={versions[kind]}" for kind in kinds),
+        get_assets_version(),
+        date.today().isoformat(),
+        str(int(time.time() // CSRF_BUCKET_SECONDS)),
+        # A new session inside the same bucket must not get a page holding the token of the old one
+        hashlib.sha1(session.get("csrf_token", "").encode()).hexdigest()[:8],
+    ]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
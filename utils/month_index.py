@@ -0,0 +1,31 @@
+import os
+
+from threading import Lock
+from typing import Callable
+
+from utils.timing import timed
+
+
+class MonthIndex:
+    """
+    Thread safe index of the (month, year) pairs of the images in a directory, newest first.
+    Built on first use and rebuilt only when the directory mtime changes (a file was added,
+    removed or renamed), so requests pay one stat instead of a listdir and parse.
+    """
+    def __init__(self, path: str, parse: Callable[[list[str]], list[tuple[str, str]]]):
+        self.path = path
+        self.parse = parse
+        self._mtime: int | None = None
+        self._months: list[tuple[str, str]] = []
+        self._lock = Lock()
+
+    def get(self) -> list[tuple[str, str]]:
+        """Returns the months of the directory, newest first."""
+        with timed("scan"):
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self._mtime:
+                with self._lock:
+                    if mtime != self._mtime:
+                        self._months = self.parse(os.listdir(self.path))
+                        self._mtime = mtime
+            return list(self._months)
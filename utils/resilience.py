@@ -0,0 +1,168 @@
+import os
+import random
+import time
+
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Final
+
+if TYPE_CHECKING:
+    import httpx
+
+
+# Shared HTTP connection pool of the Upstash REST clients (HTTP/1.1 keep-alive)
+POOL_SIZE: Final = int(os.getenv("UPSTASH_POOL_SIZE", 20))
+POOL_KEEPALIVE: Final = int(os.getenv("UPSTASH_POOL_KEEPALIVE", 10))
+KEEPALIVE_EXPIRY: Final = float(os.getenv("UPSTASH_KEEPALIVE_EXPIRY", 30))
+CONNECT_TIMEOUT: Final = float(os.getenv("UPSTASH_CONNECT_TIMEOUT", 2))
+READ_TIMEOUT: Final = float(os.getenv("UPSTASH_READ_TIMEOUT", 5))
+# Attempts after the first one on backend failures, waiting RETRY_BACKOFF * 2^attempt seconds (with jitter) in between
+RETRIES: Final = int(os.getenv("UPSTASH_RETRIES", 2))
+RETRY_BACKOFF: Final = float(os.getenv("UPSTASH_RETRY_BACKOFF", 0.1))
+# Consecutive failed calls that open the breaker, and seconds before a trial call is let through
+BREAKER_THRESHOLD: Final = int(os.getenv("UPSTASH_BREAKER_THRESHOLD", 5))
+BREAKER_RESET: Final = float(os.getenv("UPSTASH_BREAKER_RESET", 30))
+
+
+def _get_client_options() -> dict:
+    import httpx
+
+    return {
+        "timeout": httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, pool=CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=POOL_SIZE,
+            max_keepalive_connections=POOL_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _raise_server_error(response: "httpx.Response") -> None:
+    """Raises HTTPStatusError for 5xx responses, whose body the Redis client would fail to decode or pass on as a Redis error."""
+    if response.status_code >= 500:
+        response.raise_for_status()
+
+
+async def _raise_server_error_async(response: "httpx.Response") -> None:
+    _raise_server_error(response)
+
+
+def create_http_client() -> "httpx.Client":
+    """Returns a pooled keep-alive HTTP client with connect and read timeouts, raising on 5xx responses."""
+    import httpx
+
+    return httpx.Client(**_get_client_options(), event_hooks={"response": [_raise_server_error]})
+
+
+def create_async_http_client() -> "httpx.AsyncClient":
+    """Async counterpart of create_http_client, must be created inside the loop that uses it."""
+    import httpx
+
+    return httpx.AsyncClient(**_get_client_options(), event_hooks={"response": [_raise_server_error_async]})
+
+
+def get_backoff(attempt: int) -> float:
+    """Seconds to wait before retry attempt (0 based): exponential with full jitter."""
+    return random.uniform(0, RETRY_BACKOFF * 2 ** attempt)
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """
+    Whether error says the backend is unreachable or unhealthy: a failed connection, a timeout,
+    a 5xx response or a response body that is not JSON. These may pass on a retry and count
+    towards the circuit breaker. Errors the backend answered with (WRONGTYPE, ...) fail the same way every time.
+    """
+    import json
+
+    import httpx
+
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, json.JSONDecodeError))
+
+
+def retry(func: Callable, *args, retries: int = RETRIES) -> Any:
+    """Calls func, retrying on backend failures with backoff. Raises the last exception."""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == retries or not is_backend_failure(e):
+                raise
+            time.sleep(get_backoff(attempt))
+
+
+async def retry_async(func: Callable[..., Awaitable], *args, retries: int = RETRIES) -> Any:
+    """Async counterpart of retry."""
+    import asyncio
+
+    for attempt in range(retries + 1):
+        try:
+            return await func(*args)
+        except Exception as e:
+            if attempt == retries or not is_backend_failure(e):
+                raise
+            await asyncio.sleep(get_backoff(attempt))
+
+
+class CircuitBreaker:
+    """
+    Thread safe circuit breaker. Opens after threshold consecutive backend failures, so callers
+    skip the backend instead of waiting on timeouts. After reset seconds one trial call is
+    let through (half open): success closes the breaker, failure opens it again.
+    """
+    CLOSED: Final = "closed"
+    OPEN: Final = "open"
+    HALF_OPEN: Final = "half_open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset: float = BREAKER_RESET):
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._get_state()
+
+    def _get_state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend. In the half open state only one caller gets through."""
+        with self._lock:
+            state = self._get_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self) -> None:
+        """Ends a call that neither succeeded nor failed, e.g. a Redis error reply. A half open breaker lets the next call try."""
+        with self._lock:
+            self._trial = False
+
+    def reset_state(self) -> None:
+        """Closes the breaker, used after a fork."""
+        self.record_success()
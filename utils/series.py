@@ -0,0 +1,49 @@
+import math
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+
+@dataclass
+class Series:
+    """Dense daily series from start to end (inclusive), missing days are NaN."""
+    start: date
+    values: array = field(default_factory=lambda: array("d"))
+
+    @classmethod
+    def from_points(cls, start: str, end: str, points: dict[str, float]) -> "Series":
+        """Builds a series from sparse {YYYY-MM-DD: value} points."""
+        first = datetime.strptime(start, "%Y-%m-%d").date()
+        last = datetime.strptime(end, "%Y-%m-%d").date()
+        values = array("d", [math.nan]) * max((last - first).days + 1, 0)
+        for day, value in points.items():
+            index = (datetime.strptime(day, "%Y-%m-%d").date() - first).days
+            if 0 <= index < len(values):
+                values[index] = value
+        return cls(first, values)
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=len(self.values) - 1)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, day: str) -> float | None:
+        """Returns the value of a YYYY-MM-DD day, None when missing or out of range."""
+        index = (datetime.strptime(day, "%Y-%m-%d").date() - self.start).days
+        if not 0 <= index < len(self.values) or math.isnan(self.values[index]):
+            return None
+        return self.values[index]
+
+    def dates(self) -> list[str]:
+        """Returns every day of the series as YYYY-MM-DD."""
+        return [(self.start + timedelta(days=i)).isoformat() for i in range(len(self.values))]
+
+    def items(self) -> Iterator[tuple[str, float]]:
+        """Yields (YYYY-MM-DD, value) for the days that have a value."""
+        for i, value in enumerate(self.values):
+            if not math.isnan(value):
+                yield (self.start + timedelta(days=i)).isoformat(), value
@@ -0,0 +1,614 @@
+import os
+import sqlite3
+import time
+
+from datetime import datetime
+from threading import Lock, local
+from typing import TYPE_CHECKING, Final, Iterator, Protocol
+
+from utils.logger import logger
+from utils.resilience import create_http_client
+
+if TYPE_CHECKING:
+    from upstash_redis import Redis
+
+
+USERS_PREFIX: Final = "users_"
+WEIGHTS_PREFIX: Final = "weights_"
+CALORIES_PREFIX: Final = "calories_"
+WEIGHT_GUESSES_PREFIX: Final = "guess_weight_"
+TRAININGS_PREFIX: Final = "training_"
+TRAININGS_INDEX: Final = "index_trainings"
+# Daily series are stored as one hash per month: series_<name>_YYYY-MM {DD: value}
+SERIES_PREFIX: Final = "series_"
+WEIGHT_SERIES: Final = "weights"
+CALORIE_SERIES: Final = "calories"
+WEIGHTS_MIGRATED: Final = "migrated_weights_series"
+# Counters bumped on every write of a kind of data, used for page ETags and cache coherence
+VERSION_PREFIX: Final = "version_"
+
+BATCH_SIZE: Final = int(os.getenv("UPSTASH_BATCH_SIZE", 100))
+# Seconds between reconciling the training index with training keys written by other tools
+TRAINING_INDEX_TTL: Final = int(os.getenv("TRAINING_INDEX_TTL", 300))
+
+
+class StorageBackend(Protocol):
+    """
+    Raw storage operations shared by all engines.
+    Weight guesses and trainings are passed around as their encoded strings (see utils.codec),
+    trainings are returned newest first as {date: data}.
+    """
+    name: str
+    persistent: bool
+
+    def add_user(self, username: str, password: str) -> None: ...
+    def get_user(self, username: str) -> str | None: ...
+    def add_weight(self, weight: float, date: str) -> None: ...
+    def get_weight(self, date: str) -> float | None: ...
+    def add_weights(self, weights: list[tuple[str, float]], overwrite: bool) -> int: ...
+    def get_weights(self, start: str, end: str) -> dict[str, float]: ...
+    def iter_weights(self) -> Iterator[tuple[str, float]]: ...
+    def add_calories(self, calories: list[tuple[str, float]], overwrite: bool) -> int: ...
+    def get_calories(self, start: str, end: str) -> dict[str, float]: ...
+    def iter_calories(self) -> Iterator[tuple[str, float]]: ...
+    def add_weight_guess(self, username: str, data: str) -> None: ...
+    def get_weight_guess(self, username: str) -> str | None: ...
+    def get_weight_guesses(self) -> dict[str, str]: ...
+    def add_training(self, date: str, data: str) -> None: ...
+    def get_trainings(self,
+                      start: str | None,
+                      end: str | None,
+                      limit: int | None,
+                      cursor: str | None) -> dict[str, str]: ...
+    def bump_version(self, kind: str) -> None: ...
+    def get_versions(self, kinds: list[str]) -> dict[str, int]: ...
+
+
+class MemoryBackend:
+    """Process local dicts, lost on restart."""
+    name = "memory"
+    persistent = False
+
+    def __init__(self):
+        self.users: dict[str, str] = {}           # username: password
+        self.weights: dict[str, float] = {}       # date: weight
+        self.calories: dict[str, float] = {}      # date: calories
+        self.weight_guesses: dict[str, str] = {}  # username: encoded guess
+        self.trainings: dict[str, str] = {}       # date: encoded training
+        self.versions: dict[str, int] = {}        # kind: version
+
+    def add_user(self, username: str, password: str) -> None:
+        self.users[username] = password
+
+    def get_user(self, username: str) -> str | None:
+        return self.users.get(username)
+
+    def add_weight(self, weight: float, date: str) -> None:
+        self.weights[date] = weight
+
+    def get_weight(self, date: str) -> float | None:
+        return self.weights.get(date)
+
+    def add_weights(self, weights: list[tuple[str, float]], overwrite: bool) -> int:
+        written = 0
+        for date, weight in weights:
+            if overwrite or date not in self.weights:
+                self.weights[date] = weight
+                written += 1
+        return written
+
+    def get_weights(self, start: str, end: str) -> dict[str, float]:
+        return {date: weight for date, weight in self.weights.items() if start <= date <= end}
+
+    def iter_weights(self) -> Iterator[tuple[str, float]]:
+        for date in sorted(self.weights):
+            yield date, self.weights[date]
+
+    def add_calories(self, calories: list[tuple[str, float]], overwrite: bool) -> int:
+        written = 0
+        for date, value in calories:
+            if overwrite or date not in self.calories:
+                self.calories[date] = value
+                written += 1
+        return written
+
+    def get_calories(self, start: str, end: str) -> dict[str, float]:
+        return {date: value for date, value in self.calories.items() if start <= date <= end}
+
+    def iter_calories(self) -> Iterator[tuple[str, float]]:
+        for date in sorted(self.calories):
+            yield date, self.calories[date]
+
+    def add_weight_guess(self, username: str, data: str) -> None:
+        self.weight_guesses[username] = data
+
+    def get_weight_guess(self, username: str) -> str | None:
+        return self.weight_guesses.get(username)
+
+    def get_weight_guesses(self) -> dict[str, str]:
+        return dict(self.weight_guesses)
+
+    def add_training(self, date: str, data: str) -> None:
+        self.trainings[date] = data
+
+    def get_trainings(self,
+                      start: str | None,
+                      end: str | None,
+                      limit: int | None,
+                      cursor: str | None) -> dict[str, str]:
+        result = {}
+        for date in sorted(self.trainings, reverse=True):
+            if (start and date < start) or (end and date > end) or (cursor and date >= cursor):
+                continue
+            if limit and len(result) >= limit:
+                break
+            result[date] = self.trainings[date]
+        return result
+
+    def bump_version(self, kind: str) -> None:
+        self.versions[kind] = self.versions.get(kind, 0) + 1
+
+    def get_versions(self, kinds: list[str]) -> dict[str, int]:
+        return {kind: self.versions.get(kind, 0) for kind in kinds}
+
+
+class RedisBackend:
+    """Upstash Redis over its REST API."""
+    name = "redis"
+    persistent = True
+
+    def __init__(self, url: str, token: str, batch_size: int = BATCH_SIZE):
+        self.url = url
+        self.token = token
+        self.redis = self._create_client()
+        self.batch_size = batch_size
+        self._training_index_checked_at: float | None = None
+        self._training_index_lock = Lock()
+        self.weights_migrated = False
+
+    def after_fork(self) -> None:
+        """Opens a new HTTP client, connections of the parent process must not be shared."""
+        self.redis = self._create_client()
+
+    def _create_client(self) -> "Redis":
+        """
+        Redis client on a pooled keep-alive HTTP client with timeouts instead of the default
+        one that waits forever. Retries are left to Upstash._call, which backs off and feeds its circuit breaker.
+        """
+        from upstash_redis import Redis
+
+        redis = Redis(url=self.url, token=self.token, rest_retries=0)
+        # Replaces the private httpx client of upstash-redis 1.4.0 (Redis._http._client, pinned in
+        # requirements.txt), check both this and AsyncUpstash.redis when upgrading
+        redis._http._client.close()
+        redis._http._client = create_http_client()
+        return redis
+
+    def add_user(self, username: str, password: str) -> None:
+        self.redis.set(f"{USERS_PREFIX}{username}", password)
+
+    def get_user(self, username: str) -> str | None:
+        return self.redis.get(f"{USERS_PREFIX}{username}")
+
+    def add_weight(self, weight: float, date: str) -> None:
+        self.redis.hset(series_key(WEIGHT_SERIES, date), date[8:], weight)
+
+    def get_weight(self, date: str) -> float | None:
+        self._migrate_weights_once()
+        result = self.redis.hget(series_key(WEIGHT_SERIES, date), date[8:])
+        if result is None:
+            return None
+        return float(result)
+
+    def add_weights(self, weights: list[tuple[str, float]], overwrite: bool) -> int:
+        return self._add_series(WEIGHT_SERIES, weights, overwrite)
+
+    def get_weights(self, start: str, end: str) -> dict[str, float]:
+        self._migrate_weights_once()
+        return self._get_series(WEIGHT_SERIES, start, end)
+
+    def iter_weights(self) -> Iterator[tuple[str, float]]:
+        self._migrate_weights_once()
+        return self._iter_series(WEIGHT_SERIES)
+
+    def add_calories(self, calories: list[tuple[str, float]], overwrite: bool) -> int:
+        return self._add_series(CALORIE_SERIES, calories, overwrite)
+
+    def get_calories(self, start: str, end: str) -> dict[str, float]:
+        return self._get_series(CALORIE_SERIES, start, end)
+
+    def iter_calories(self) -> Iterator[tuple[str, float]]:
+        return self._iter_series(CALORIE_SERIES)
+
+    def _add_series(self, series: str, points: list[tuple[str, float]], overwrite: bool) -> int:
+        """Writes points with one pipeline request per batch, HSETNX when not overwriting."""
+        written = 0
+        for i in range(0, len(points), self.batch_size):
+            pipeline = self.redis.pipeline()
+            for date, value in points[i:i + self.batch_size]:
+                if overwrite:
+                    pipeline.hset(series_key(series, date), date[8:], value)
+                else:
+                    pipeline.hsetnx(series_key(series, date), date[8:], value)
+            results = pipeline.exec()
+            # HSET returns 0 when updating an existing field
+            written += len(results) if overwrite else sum(1 for result in results if result)
+        return written
+
+    def _get_series(self, series: str, start: str, end: str) -> dict[str, float]:
+        """Gets points between start and end (inclusive) with one HGETALL per month, in one pipeline."""
+        months = _months_between(start, end)
+        pipeline = self.redis.pipeline()
+        for month in months:
+            pipeline.hgetall(f"{SERIES_PREFIX}{series}_{month}")
+
+        points = {}
+        for month, days in zip(months, pipeline.exec()):
+            for day, value in (days or {}).items():
+                date = f"{month}-{day}"
+                if start <= date <= end:
+                    points[date] = float(value)
+        return points
+
+    def _iter_series(self, series: str) -> Iterator[tuple[str, float]]:
+        """Yields points by date, one month hash at a time."""
+        prefix = f"{SERIES_PREFIX}{series}_"
+        for key in sorted(self.scan_keys(f"{prefix}*")):
+            month = key.replace(prefix, "", 1)
+            days = self.redis.hgetall(key) or {}
+            for day in sorted(days):
+                yield f"{month}-{day}", float(days[day])
+
+    def _migrate_weights_once(self) -> None:
+        """Moves legacy weights_<date> keys into the month hashes the first time this process reads weights."""
+        if self.weights_migrated:
+            return
+        if not self.redis.get(WEIGHTS_MIGRATED):
+            self.migrate_legacy_weights()
+        self.weights_migrated = True
+
+    def migrate_legacy_weights(self) -> int:
+        """Copies legacy weights_<date> keys into the month hashes. Returns the number of weights copied."""
+        keys = self.scan_keys(f"{WEIGHTS_PREFIX}*")
+        weights = [
+            (key.replace(WEIGHTS_PREFIX, "", 1), float(value))
+            for key, value in zip(keys, self.get_many(keys))
+            if value is not None
+        ]
+        self.weights_migrated = True
+        copied = self.add_weights(weights, overwrite=False)
+        self.redis.set(WEIGHTS_MIGRATED, 1)
+        logger.info(f"Migrated legacy weights: {copied} of {len(weights)}")
+        return copied
+
+    def add_weight_guess(self, username: str, data: str) -> None:
+        self.redis.set(f"{WEIGHT_GUESSES_PREFIX}{username}", data)
+
+    def get_weight_guess(self, username: str) -> str | None:
+        return self.redis.get(f"{WEIGHT_GUESSES_PREFIX}{username}")
+
+    def get_weight_guesses(self) -> dict[str, str]:
+        keys = self.scan_keys(f"{WEIGHT_GUESSES_PREFIX}*")
+        return {
+            key.replace(WEIGHT_GUESSES_PREFIX, "", 1): data
+            for key, data in zip(keys, self.get_many(keys))
+            if data is not None
+        }
+
+    def add_training(self, date: str, data: str) -> None:
+        """Adds training and its date index entry in one transaction."""
+        transaction = self.redis.multi()
+        transaction.set(f"{TRAININGS_PREFIX}{date}", data)
+        transaction.zadd(TRAININGS_INDEX, {date: _date_score(date)})
+        transaction.exec()
+
+    def get_trainings(self,
+                      start: str | None,
+                      end: str | None,
+                      limit: int | None,
+                      cursor: str | None) -> dict[str, str]:
+        """Gets trainings through the date index, reconciled with the training keys every TRAINING_INDEX_TTL seconds."""
+        self._reconcile_training_index()
+
+        # Newest first: ZRANGE index max min BYSCORE REV
+        max_score = _date_score(end) if end else "+inf"
+        if cursor and (end is None or _date_score(cursor) <= _date_score(end)):
+            max_score = f"({_date_score(cursor)}"
+        min_score = _date_score(start) if start else "-inf"
+        dates = self.redis.zrange(TRAININGS_INDEX, max_score, min_score,
+                                  sortby="BYSCORE", rev=True,
+                                  offset=0 if limit else None,
+                                  count=limit)
+
+        training_values = self.get_many([f"{TRAININGS_PREFIX}{date}" for date in dates])
+        return {date: data for date, data in zip(dates, training_values) if data is not None}
+
+    def bump_version(self, kind: str) -> None:
+        self.redis.incr(f"{VERSION_PREFIX}{kind}")
+
+    def get_versions(self, kinds: list[str]) -> dict[str, int]:
+        values = self.redis.mget(*[f"{VERSION_PREFIX}{kind}" for kind in kinds])
+        return {kind: int(value or 0) for kind, value in zip(kinds, values)}
+
+    def _reconcile_training_index(self) -> None:
+        """Rebuilds the index when it was last checked more than TRAINING_INDEX_TTL seconds ago, once per process at a time."""
+        checked_at = self._training_index_checked_at
+        if checked_at is not None and time.monotonic() - checked_at < TRAINING_INDEX_TTL:
+            return
+        with self._training_index_lock:
+            checked_at = self._training_index_checked_at
+            if checked_at is None or time.monotonic() - checked_at >= TRAINING_INDEX_TTL:
+                self.rebuild_training_index()
+
+    def rebuild_training_index(self) -> int:
+        """
+        Adds training keys missing from the date index (e.g. written by other tools) and removes
+        entries whose key is gone. Bumps the trainings version when the index changed, so cached
+        pages and ETags follow. Returns the number of trainings added.
+        """
+        training_keys = self.scan_keys(f"{TRAININGS_PREFIX}*")
+        dates = {key.replace(TRAININGS_PREFIX, "", 1) for key in training_keys}
+        indexed = set(self.redis.zrange(TRAININGS_INDEX, 0, -1))
+        missing = sorted(dates - indexed)
+        removed = sorted(indexed - dates)
+
+        if missing or removed:
+            pipeline = self.redis.pipeline()
+            for i in range(0, len(missing), self.batch_size):
+                batch = missing[i:i + self.batch_size]
+                pipeline.zadd(TRAININGS_INDEX, {date: _date_score(date) for date in batch})
+            for i in range(0, len(removed), self.batch_size):
+                pipeline.zrem(TRAININGS_INDEX, *removed[i:i + self.batch_size])
+            pipeline.exec()
+            # DATA_VERSIONS kind of the trainings in utils.upstash
+            self.bump_version("trainings")
+            logger.info("Reconciled training index: {} added, {} removed", len(missing), len(removed))
+
+        self._training_index_checked_at = time.monotonic()
+        return len(missing)
+
+    def scan_keys(self, pattern: str) -> list[str]:
+        """Returns all keys matching pattern, walking the keyspace with SCAN."""
+        keys = []
+        cursor = 0
+        while True:
+            cursor, batch = self.redis.scan(cursor, match=pattern, count=self.batch_size)
+            keys.extend(batch)
+            if int(cursor) == 0:
+                break
+        # SCAN may return a key more than once
+        return list(dict.fromkeys(keys))
+
+    def get_many(self, keys: list[str]) -> list[str | None]:
+        """Returns values for keys, fetched with one MGET per batch in a single pipeline."""
+        if not keys:
+            return []
+
+        pipeline = self.redis.pipeline()
+        for i in range(0, len(keys), self.batch_size):
+            pipeline.mget(*keys[i:i + self.batch_size])
+
+        values = []
+        for batch in pipeline.exec():
+            values.extend(batch)
+        return values
+
+
+class SQLiteBackend:
+    """Local on-disk SQLite database in WAL mode, one connection per thread."""
+    name = "sqlite"
+    persistent = True
+
+    SCHEMA: Final = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS weights (
+            date TEXT PRIMARY KEY,
+            weight REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS calories (
+            date TEXT PRIMARY KEY,
+            calories REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS weight_guesses (
+            username TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS trainings (
+            date TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS versions (
+            kind TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection.executescript(self.SCHEMA)
+
+    def after_fork(self) -> None:
+        """Drops the connections of the parent process, each worker opens its own."""
+        self._local = local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current thread, opened on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _fetch_value(self, query: str, *params):
+        row = self.connection.execute(query, params).fetchone()
+        return None if row is None else row[0]
+
+    def add_user(self, username: str, password: str) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO users (username, password) VALUES (?, ?)", (username, password))
+
+    def get_user(self, username: str) -> str | None:
+        return self._fetch_value("SELECT password FROM users WHERE username = ?", username)
+
+    def add_weight(self, weight: float, date: str) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO weights (date, weight) VALUES (?, ?)", (date, weight))
+
+    def get_weight(self, date: str) -> float | None:
+        return self._fetch_value("SELECT weight FROM weights WHERE date = ?", date)
+
+    def add_weights(self, weights: list[tuple[str, float]], overwrite: bool) -> int:
+        """Writes weights in a single transaction."""
+        conflict = "REPLACE" if overwrite else "IGNORE"
+        connection = self.connection
+        with connection:
+            connection.execute("BEGIN")
+            cursor = connection.executemany(
+                f"INSERT OR {conflict} INTO weights (date, weight) VALUES (?, ?)", weights)
+        return cursor.rowcount
+
+    def get_weights(self, start: str, end: str) -> dict[str, float]:
+        return dict(self.connection.execute(
+            "SELECT date, weight FROM weights WHERE date BETWEEN ? AND ?", (start, end)).fetchall())
+
+    def iter_weights(self) -> Iterator[tuple[str, float]]:
+        yield from self.connection.execute("SELECT date, weight FROM weights ORDER BY date")
+
+    def add_calories(self, calories: list[tuple[str, float]], overwrite: bool) -> int:
+        """Writes calories in a single transaction."""
+        conflict = "REPLACE" if overwrite else "IGNORE"
+        connection = self.connection
+        with connection:
+            connection.execute("BEGIN")
+            cursor = connection.executemany(
+                f"INSERT OR {conflict} INTO calories (date, calories) VALUES (?, ?)", calories)
+        return cursor.rowcount
+
+    def get_calories(self, start: str, end: str) -> dict[str, float]:
+        return dict(self.connection.execute(
+            "SELECT date, calories FROM calories WHERE date BETWEEN ? AND ?", (start, end)).fetchall())
+
+    def iter_calories(self) -> Iterator[tuple[str, float]]:
+        yield from self.connection.execute("SELECT date, calories FROM calories ORDER BY date")
+
+    def add_weight_guess(self, username: str, data: str) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO weight_guesses (username, data) VALUES (?, ?)", (username, data))
+
+    def get_weight_guess(self, username: str) -> str | None:
+        return self._fetch_value("SELECT data FROM weight_guesses WHERE username = ?", username)
+
+    def get_weight_guesses(self) -> dict[str, str]:
+        return dict(self.connection.execute("SELECT username, data FROM weight_guesses").fetchall())
+
+    def add_training(self, date: str, data: str) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO trainings (date, data) VALUES (?, ?)", (date, data))
+
+    def get_trainings(self,
+                      start: str | None,
+                      end: str | None,
+                      limit: int | None,
+                      cursor: str | None) -> dict[str, str]:
+        conditions, params = [], []
+        if start:
+            conditions.append("date >= ?")
+            params.append(start)
+        if end:
+            conditions.append("date <= ?")
+            params.append(end)
+        if cursor:
+            conditions.append("date < ?")
+            params.append(cursor)
+
+        query = "SELECT date, data FROM trainings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY date DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return dict(self.connection.execute(query, params).fetchall())
+
+    def bump_version(self, kind: str) -> None:
+        self.connection.execute(
+            "INSERT INTO versions (kind, version) VALUES (?, 1) "
+            "ON CONFLICT (kind) DO UPDATE SET version = version + 1", (kind,))
+
+    def get_versions(self, kinds: list[str]) -> dict[str, int]:
+        placeholders = ", ".join("?" * len(kinds))
+        versions = dict(self.connection.execute(
+            f"SELECT kind, version FROM versions WHERE kind IN ({placeholders})", kinds).fetchall())
+        return {kind: versions.get(kind, 0) for kind in kinds}
+
+
+def create_backend() -> StorageBackend:
+    """
+    Returns the backend selected by STORAGE_BACKEND (upstash, sqlite or memory).
+    Defaults to Upstash when its credentials are set, memory otherwise.
+    """
+    redis_url = os.getenv("UPSTASH_REDIS_REST_URL")
+    redis_token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
+    default = "upstash" if redis_url and redis_token else "memory"
+    choice = os.getenv("STORAGE_BACKEND", default).lower()
+
+    if choice == "sqlite":
+        path = os.getenv("SQLITE_PATH", os.path.join("data", "progress.db"))
+        logger.info(f"Using SQLite storage: {path}")
+        return SQLiteBackend(path)
+
+    if choice == "upstash":
+        if redis_url and redis_token:
+            try:
+                backend = RedisBackend(redis_url, redis_token)
+                logger.info("Connected to Upstash Redis")
+                return backend
+
+            except Exception as e:
+                logger.error(f"Failed to connect to Upstash Redis: {e}")
+        else:
+            logger.info("No Redis credentials found, using in-memory storage")
+
+    elif choice != "memory":
+        logger.error(f"Unknown STORAGE_BACKEND: {choice}, using in-memory storage")
+
+    return MemoryBackend()
+
+
+def normalize_date(date: str) -> str:
+    """
+    Returns date as zero padded YYYY-MM-DD, which series_key and the day fields slice.
+    Raises ValueError when it is not a date.
+    """
+    return datetime.strptime(date.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+
+
+def series_key(series: str, date: str) -> str:
+    """Returns the month hash key holding a YYYY-MM-DD date of series."""
+    return f"{SERIES_PREFIX}{series}_{date[:7]}"
+
+
+def _months_between(start: str, end: str) -> list[str]:
+    """Returns the YYYY-MM months from start to end (inclusive)."""
+    year, month = int(start[:4]), int(start[5:7])
+    last = (int(end[:4]), int(end[5:7]))
+    months = []
+    while (year, month) <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _date_score(date: str) -> int:
+    """Returns the sorted set score of a YYYY-MM-DD date (YYYYMMDD)."""
+    return int(date.replace("-", ""))
@@ -0,0 +1,108 @@
+import os
+import time
+
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Final
+
+
+# Request timings are only collected (and the hooks only registered) when enabled
+TIMING_ENABLED: Final = os.getenv("REQUEST_TIMING", "False") == "True"
+
+_timings: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Time spent per metric during one request, e.g. upstash.weights.get_weights or render."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.metrics: dict[str, list[float | int]] = {}  # name: [seconds, calls]
+        self.render_starts: list[float] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        metric = self.metrics.get(name)
+        if metric is None:
+            self.metrics[name] = [seconds, 1]
+        else:
+            metric[0] += seconds
+            metric[1] += 1
+
+    def get_total(self) -> float:
+        """Seconds since the request started."""
+        return time.perf_counter() - self.start
+
+    def to_dict(self) -> dict[str, dict[str, float | int]]:
+        """Returns {name: {"ms": total milliseconds, "calls": count}}, the total wall time included."""
+        result = {"total": {"ms": round(self.get_total() * 1000, 2), "calls": 1}}
+        for name, (seconds, calls) in self.metrics.items():
+            result[name] = {"ms": round(seconds * 1000, 2), "calls": calls}
+        return result
+
+    def get_header(self) -> str:
+        """Returns the Server-Timing header value."""
+        entries = []
+        for name, metric in self.to_dict().items():
+            entry = f"{name};dur={metric['ms']}"
+            if name != "total":
+                entry += f';desc="{metric["calls"]}x"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+class Timer:
+    """Context manager adding the time spent in its block to a metric of a request."""
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name: str, timings: RequestTimings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.timings.add(self.name, time.perf_counter() - self.start)
+
+
+_NO_TIMER: Final = nullcontext()
+
+
+def timed(name: str) -> Timer | nullcontext:
+    """
+    Times a block under name for the current request: with timed("scan"): ...
+    Outside timed requests a shared no-op context is returned, costing one context variable lookup.
+    """
+    timings = _timings.get()
+    if timings is None:
+        return _NO_TIMER
+    return Timer(name, timings)
+
+
+def start_request() -> None:
+    _timings.set(RequestTimings())
+
+
+def finish_request() -> RequestTimings | None:
+    """Returns the timings of the current request and stops collecting."""
+    timings = _timings.get()
+    _timings.set(None)
+    return timings
+
+
+def get_request_timings() -> RequestTimings | None:
+    return _timings.get()
+
+
+def on_render_start(*_, **__) -> None:
+    """before_render_template signal receiver."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.render_starts.append(time.perf_counter())
+
+
+def on_render_end(*_, **__) -> None:
+    """template_rendered signal receiver."""
+    timings = _timings.get()
+    if timings is not None and timings.render_starts:
+        timings.add("render", time.perf_counter() - timings.render_starts.pop())
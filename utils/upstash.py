@@ -1,233 +1,384 @@
 import os
+import time
 
-from typing import Final
-from upstash_redis import Redis
+from threading import Lock, local
+from typing import Callable, Final, Iterator
 
+from utils.cache import TTLCache
+from utils.codec import decode_training, decode_weight_guess, encode_training, encode_weight_guess, is_legacy
 from utils.logger import logger
+from utils.metrics import STORAGE_CALLS, STORAGE_DURATION, STORAGE_ERRORS, STORAGE_FALLBACKS, metrics
+from utils.resilience import RETRIES, CircuitBreaker, is_backend_failure, retry
+from utils.series import Series
+from utils.timing import timed
+from utils.storage import (
+    USERS_PREFIX,
+    WEIGHTS_PREFIX,
+    CALORIES_PREFIX,
+    WEIGHT_GUESSES_PREFIX,
+    TRAININGS_PREFIX,
+    VERSION_PREFIX,
+    MemoryBackend,
+    RedisBackend,
+    StorageBackend,
+    create_backend,
+    normalize_date,
+)
 
 
-USERS_PREFIX: Final = "users_"
-WEIGHTS_PREFIX: Final = "weights_"
-WEIGHT_GUESSES_PREFIX: Final = "guess_weight_"
-TRAININGS_PREFIX: Final = "training_"
+# Seconds a read stays cached per key prefix
+CACHE_TTLS: Final = {
+    USERS_PREFIX: int(os.getenv("CACHE_TTL_USERS", 300)),
+    WEIGHTS_PREFIX: int(os.getenv("CACHE_TTL_WEIGHTS", 600)),
+    CALORIES_PREFIX: int(os.getenv("CACHE_TTL_CALORIES", 600)),
+    WEIGHT_GUESSES_PREFIX: int(os.getenv("CACHE_TTL_GUESSES", 600)),
+    TRAININGS_PREFIX: int(os.getenv("CACHE_TTL_TRAININGS", 600)),
+    VERSION_PREFIX: int(os.getenv("CACHE_TTL_VERSIONS", 5)),
+}
+# Version counter of each cached kind of data
+DATA_VERSIONS: Final = {
+    WEIGHTS_PREFIX: "weights",
+    CALORIES_PREFIX: "calories",
+    WEIGHT_GUESSES_PREFIX: "guesses",
+    TRAININGS_PREFIX: "trainings",
+}
+CACHE_SIZE: Final = int(os.getenv("CACHE_SIZE", 1024))
+# Key prefix of the data each backend operation works on, used to name timings
+OPERATION_PREFIXES: Final = {
+    "add_user": USERS_PREFIX,
+    "get_user": USERS_PREFIX,
+    "add_weight": WEIGHTS_PREFIX,
+    "get_weight": WEIGHTS_PREFIX,
+    "add_weights": WEIGHTS_PREFIX,
+    "get_weights": WEIGHTS_PREFIX,
+    "add_calories": CALORIES_PREFIX,
+    "get_calories": CALORIES_PREFIX,
+    "add_weight_guess": WEIGHT_GUESSES_PREFIX,
+    "get_weight_guess": WEIGHT_GUESSES_PREFIX,
+    "add_training": TRAININGS_PREFIX,
+    "get_trainings": TRAININGS_PREFIX,
+    "bump_version": VERSION_PREFIX,
+    "get_versions": VERSION_PREFIX,
+}
+# Not retried: INCR, HSETNX counts and the training MULTI/EXEC would be applied twice
+# when a request failed after the backend ran it
+WRITE_OPERATIONS: Final = frozenset({
+    "add_user", "add_weight", "add_weights", "add_calories", "add_weight_guess", "add_training", "bump_version",
+})
+# upstash.<prefix>.<operation>, e.g. upstash.weights.get_weights
+TIMING_NAMES: Final = {
+    operation: f"upstash.{prefix.rstrip('_')}.{operation}" for operation, prefix in OPERATION_PREFIXES.items()
+}
+
+_MISSING = object()
 
 
 class Upstash:
     """Handles all data storage operations."""
-    def __init__(self):
-        self.redis: Redis | None = None
-        self.users_memory: dict[str, str] = {}           # username: password
-        self.weights_memory: dict[str, float] = {}       # date: weight
-        self.weight_guesses_memory: dict[str, str] = {}  # username: date|weight
-        self._init_redis()
-        if self.redis is None:
-            self._add_user_to_memory(os.getenv("LOCAL_USERNAME"), os.getenv("LOCAL_PASSWORD"))
-
-    def _init_redis(self) -> None:
-        """Initializes Redis client if environment variables are available."""
-        redis_url = os.getenv("UPSTASH_REDIS_REST_URL")
-        redis_token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
-        
-        if redis_url and redis_token:
-            try:
-                self.redis = Redis(url=redis_url, token=redis_token)
-                logger.info("Connected to Upstash Redis")
-            
-            except Exception as e:
-                logger.error(f"Failed to connect to Upstash Redis: {e}")
-                self.redis = None
-        else:
-            logger.info("No Redis credentials found, using in-memory storage")
-    
-    def add_user(self, username: str, password: str) -> None:
-        """Adds user to Redis or memory fallback."""
-        if self.redis:
-            return self._add_user_to_redis(username, password)
-        else:
-            self._add_user_to_memory(username, password)
-            return False
-    
-    def _add_user_to_redis(self, username: str, password: str) -> None:
-        """Adds user to Redis."""
-        try:
-            self.redis.set(f"{USERS_PREFIX}{username}", password)
-            return True
-        
-        except Exception as e:
-            logger.error(f"Error adding user to Redis: {e}")
-            self._add_user_to_memory(username, password)
-            return False
-    
-    def get_user(self, username: str) -> tuple[str, str] | tuple[None, None]:
-        """Gets user from Redis or memory fallback."""
-        if self.redis:
-            return self._get_user_from_redis(username)
-        else:
-            return self._get_user_from_memory(username)
-    
-    def _get_user_from_redis(self, username: str) -> str | None:
-        """Gets user from Redis."""
-        try:
-            result = self.redis.get(f"{USERS_PREFIX}{username}")
+    def __init__(self, backend: StorageBackend | None = None, cache_size: int = CACHE_SIZE):
+        self._backend: StorageBackend | None = None
+        self._fallback: MemoryBackend | None = None
+        self._backend_lock = Lock()
+        self.cache = TTLCache(max_size=cache_size)
+        self.breaker = CircuitBreaker()
+        metrics.register_cache("storage", self.cache)
+        self._local = local()  # degraded: the current read was answered by the fallback
+        self._aio = None
+        self._runner = None
+        self._versions: dict[str, int] = {}
+        if backend is not None:
+            self._init_backend(backend)
+
+    @property
+    def backend(self) -> StorageBackend:
+        """The storage backend, created on first use so importing this module opens no connections."""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._init_backend(create_backend())
+        return self._backend
+
+    @property
+    def fallback(self) -> MemoryBackend:
+        """Memory storage used when the backend fails."""
+        self.backend  # creates the backend and its fallback on first use
+        return self._fallback
+
+    def _init_backend(self, backend: StorageBackend) -> None:
+        self._fallback = backend if isinstance(backend, MemoryBackend) else MemoryBackend()
+        if not backend.persistent:
+            backend.add_user(os.getenv("LOCAL_USERNAME"), os.getenv("LOCAL_PASSWORD"))
+        # Set last, other threads only skip the lock once the backend is ready
+        self._backend = backend
+
+    @property
+    def persistent(self) -> bool:
+        """Whether writes survive a restart."""
+        return self.backend.persistent
+
+    @property
+    def aio(self):
+        """Async reads (AsyncUpstash) for concurrent lookups through gather()."""
+        if self._aio is None:
+            from utils.upstash_async import AsyncUpstash
+
+            url, token = None, None
+            if isinstance(self.backend, RedisBackend):
+                url, token = self.backend.url, self.backend.token
+            self._aio = AsyncUpstash(self, url, token)
+        return self._aio
+
+    def gather(self, *awaitables) -> list:
+        """Runs async reads (from upstash.aio) concurrently and returns their results in order."""
+        if self._runner is None:
+            from utils.upstash_async import AsyncRunner
+
+            self._runner = AsyncRunner()
+        with timed("upstash.gather"):
+            return self._runner.gather(*awaitables)
+
+    def after_fork(self) -> None:
+        """Resets connections and cached reads inherited from a preloading parent process."""
+        self.cache.clear()
+        self._versions = {}
+        self.breaker.reset_state()
+        after_fork = getattr(self._backend, "after_fork", None)
+        if after_fork is not None:
+            after_fork()
+
+    def _call(self, operation: str, *args):
+        """
+        Runs operation on the backend, retrying reads on backend failures with backoff. Falls back to
+        memory storage on errors and while the circuit breaker is open, so a down backend cannot hang
+        a worker. Only backend failures count towards the breaker and only successes close it.
+        """
+        start = time.perf_counter()
+        metrics.inc(STORAGE_CALLS, operation)
+        with timed(TIMING_NAMES[operation]):
+            if self.breaker.allow():
+                try:
+                    retries = 0 if operation in WRITE_OPERATIONS else RETRIES
+                    result = retry(getattr(self.backend, operation), *args, retries=retries)
+                    self.breaker.record_success()
+                    metrics.observe(STORAGE_DURATION, time.perf_counter() - start, operation)
+                    return result
+
+                except Exception as e:
+                    if is_backend_failure(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.release()
+                    metrics.inc(STORAGE_ERRORS, operation)
+                    logger.error("Error in {} {}: {}", self.backend.name, operation, e)
+
+            self._local.degraded = True
+            metrics.inc(STORAGE_FALLBACKS, operation)
+            result = getattr(self.fallback, operation)(*args)
+            metrics.observe(STORAGE_DURATION, time.perf_counter() - start, operation)
             return result
-        
-        except Exception as e:
-            logger.error(f"Error fetching user from Redis: {e}")
-            return self._get_user_from_memory(username)
-    
+
+    def add_user(self, username: str, password: str) -> None:
+        """Adds user to storage."""
+        self.cache.invalidate((USERS_PREFIX, username))
+        self._call("add_user", username, password)
+
+    def get_user(self, username: str) -> str | None:
+        """Gets user password from cache or storage."""
+        return self._cached(USERS_PREFIX, username, self._call, "get_user", username)
+
     def add_weight(self, weight: float, date: str) -> None:
-        """Adds weight to Redis or memory fallback."""
-        if self.redis:
-            self._add_weight_to_redis(weight, date)
-        else:
-            self._add_weight_to_memory(weight, date)
-    
-    def _add_weight_to_redis(self, weight: float, date: str) -> None:
-        """Adds weight to Redis."""
-        try:
-            self.redis.set(f"{WEIGHTS_PREFIX}{date}", weight)
-        
-        except Exception as e:
-            logger.error(f"Error adding weight to Redis: {e}")
-            self._add_weight_to_memory(weight, date)
+        """Adds weight to storage."""
+        self._call("add_weight", weight, normalize_date(date))
+        # Cached ranges may contain the date
+        self._bump_version(WEIGHTS_PREFIX)
 
     def get_weight(self, date: str) -> float | None:
-        """Gets weight from Redis or memory fallback."""
-        if self.redis:
-            return self._get_weight_from_redis(date)
-        else:
-            return self._get_weight_from_memory(date)
-    
-    def _get_weight_from_redis(self, date: str) -> float | None:
-        """Gets weight from Redis."""
-        try:
-            result = self.redis.get(f"{WEIGHTS_PREFIX}{date}")
-            if result is None:
-                return None
-            return float(result)
-        
-        except Exception as e:
-            logger.error(f"Error fetching weight from Redis: {e}")
-            return self._get_weight_from_memory(date)
-    
+        """Gets weight from cache or storage."""
+        return self._cached(WEIGHTS_PREFIX, date, self._call, "get_weight", date)
+
+    def add_weights(self, weights: list[tuple[str, float]], overwrite: bool = False) -> int:
+        """Adds many (date, weight) rows to storage. Returns the number of rows written."""
+        weights = [(normalize_date(date), weight) for date, weight in weights]
+        written = self._call("add_weights", weights, overwrite)
+        self._bump_version(WEIGHTS_PREFIX)
+        return written
+
+    def get_weights(self, start: str, end: str) -> Series:
+        """Gets the daily weights between start and end (YYYY-MM-DD, inclusive) as a dense series."""
+        return self._cached(WEIGHTS_PREFIX, (start, end), self._get_weights, start, end)
+
+    def _get_weights(self, start: str, end: str) -> Series:
+        """Gets weights from storage as a dense series."""
+        return Series.from_points(start, end, self._call("get_weights", start, end))
+
+    def iter_weights(self) -> Iterator[tuple[str, float]]:
+        """Yields all stored (date, weight) rows ordered by date."""
+        return self.backend.iter_weights()
+
+    def add_calories(self, calories: list[tuple[str, float]], overwrite: bool = False) -> int:
+        """Adds many (date, calories) rows to storage. Returns the number of rows written."""
+        calories = [(normalize_date(date), value) for date, value in calories]
+        written = self._call("add_calories", calories, overwrite)
+        self._bump_version(CALORIES_PREFIX)
+        return written
+
+    def get_calories(self, start: str, end: str) -> Series:
+        """Gets the daily calories between start and end (YYYY-MM-DD, inclusive) as a dense series."""
+        return self._cached(CALORIES_PREFIX, (start, end), self._get_calories, start, end)
+
+    def _get_calories(self, start: str, end: str) -> Series:
+        """Gets calories from storage as a dense series."""
+        return Series.from_points(start, end, self._call("get_calories", start, end))
+
+    def iter_calories(self) -> Iterator[tuple[str, float]]:
+        """Yields all stored (date, calories) rows ordered by date."""
+        return self.backend.iter_calories()
+
     def add_weight_guess(self, username: str, date: str, weight: float) -> None:
-        """Adds weight guess to Redis or memory fallback."""
-        if self.redis:
-            self._add_weight_guess_to_redis(username, date, weight)
-        else:
-            self._add_weight_guess_to_memory(username, date, weight)
-    
-    def _add_weight_guess_to_redis(self, username: str, date: str, weight: float) -> None:
-        """Adds weight guess to Redis."""
-        try:
-            data = f"{date}|{weight}"
-            self.redis.set(f"{WEIGHT_GUESSES_PREFIX}{username}", data)
-        except Exception as e:
-            logger.error(f"Error adding weight guess to Redis: {e}")
-            self._add_weight_guess_to_memory(username, date, weight)
-    
+        """Adds weight guess to storage."""
+        self._call("add_weight_guess", username, encode_weight_guess(date, weight))
+        self._bump_version(WEIGHT_GUESSES_PREFIX)
+
     def get_weight_guess(self, username: str) -> tuple[str | None, float | None]:
-        """Gets weight guess from Redis or memory fallback. Returns tuple of (date, weight)"""
-        if self.redis:
-            return self._get_weight_guess_from_redis(username)
-        else:
-            return self._get_weight_guess_from_memory(username)
-    
-    def _get_weight_guess_from_redis(self, username: str) -> tuple[str | None, float | None]:
-        """Gets weight guess from Redis"""
-        try:
-            result = self.redis.get(f"{WEIGHT_GUESSES_PREFIX}{username}")
-            if result is None:
-                return None, None
-            
-            date_str, weight_str = result.split("|")
-            return date_str, float(weight_str)
-        
-        except Exception as e:
-            logger.error(f"Error fetching weight guess from Redis: {e}")
+        """Gets weight guess from cache or storage. Returns tuple of (date, weight)"""
+        return self._cached(WEIGHT_GUESSES_PREFIX, username, self._get_weight_guess, username)
+
+    def _get_weight_guess(self, username: str) -> tuple[str | None, float | None]:
+        """Gets and parses weight guess from storage."""
+        return self._parse_weight_guess(self._call("get_weight_guess", username))
+
+    def add_training(self, date: str, duration: int | str, exercises: list[dict]) -> None:
+        """Adds training to storage."""
+        self._call("add_training", date, encode_training(date, duration, exercises))
+        # Cached pages and ranges may all contain the new training
+        self._bump_version(TRAININGS_PREFIX)
+
+    def get_trainings(self,
+                      start: str | None = None,
+                      end: str | None = None,
+                      limit: int | None = None,
+                      cursor: str | None = None) -> dict[str, dict]:
+        """
+        Gets training data from cache or storage, newest first.
+        start and end (YYYY-MM-DD) are inclusive bounds, cursor is an exclusive
+        upper bound used for keyset pagination (pass the oldest date of the previous page).
+        """
+        query = (start, end, limit, cursor)
+        return self._cached(TRAININGS_PREFIX, query, self._get_trainings, *query)
+
+    def _get_trainings(self,
+                       start: str | None,
+                       end: str | None,
+                       limit: int | None,
+                       cursor: str | None) -> dict[str, dict]:
+        """Gets and parses training data from storage."""
+        trainings = self._call("get_trainings", start, end, limit, cursor)
+        result = {}
+        for date, data in trainings.items():
+            try:
+                result[date] = decode_training(data)
+            except Exception as e:
+                logger.error("Error decoding training {}: {}", date, e)
+        return result
+
+    def migrate_records(self) -> dict[str, int]:
+        """
+        Rewrites legacy pipe delimited trainings and weight guesses in the current codec format
+        and copies legacy per date weight keys into the monthly weight series.
+        """
+        migrated = {"trainings": 0, "weight_guesses": 0}
+
+        for date, data in self.backend.get_trainings(None, None, None, None).items():
+            if is_legacy(data):
+                training = decode_training(data)
+                self.backend.add_training(date, encode_training(date, training["duration"], training["exercises"]))
+                migrated["trainings"] += 1
+
+        for username, data in self.backend.get_weight_guesses().items():
+            if is_legacy(data):
+                self.backend.add_weight_guess(username, encode_weight_guess(*decode_weight_guess(data)))
+                migrated["weight_guesses"] += 1
+
+        if isinstance(self.backend, RedisBackend):
+            migrated["weights"] = self.backend.migrate_legacy_weights()
+
+        self.cache.clear()
+        for prefix in DATA_VERSIONS:
+            self._bump_version(prefix)
+        return migrated
+
+    def rebuild_training_index(self) -> int:
+        """Indexes trainings written to Redis by other tools. Returns the number of trainings added."""
+        if not isinstance(self.backend, RedisBackend):
+            # Memory and SQLite trainings are only written through add_training
+            return 0
+
+        added = self.backend.rebuild_training_index()
+        self.cache.invalidate_prefix(TRAININGS_PREFIX)
+        self.cache.invalidate((VERSION_PREFIX, None))
+        return added
+
+    def get_versions(self) -> dict[str, int]:
+        """
+        Gets the write counter of each kind of data (see DATA_VERSIONS), cached for a few seconds.
+        Cached reads of a kind whose counter was bumped by another process are dropped.
+        """
+        return self._cached(VERSION_PREFIX, None, self._get_versions)
+
+    def _get_versions(self) -> dict[str, int]:
+        """Gets the write counters from storage and invalidates the kinds that changed."""
+        versions = self._call("get_versions", list(DATA_VERSIONS.values()))
+        if self._local.degraded:
+            # Fallback counters say nothing about the backend, keep the cached reads as failover
+            return versions
+        for prefix, kind in DATA_VERSIONS.items():
+            if kind in self._versions and self._versions[kind] != versions[kind]:
+                self.cache.invalidate_prefix(prefix)
+        self._versions = versions
+        return versions
+
+    def _bump_version(self, prefix: str) -> None:
+        """Drops cached reads of a kind of data after a write and bumps its counter."""
+        self.cache.invalidate_prefix(prefix)
+        self._call("bump_version", DATA_VERSIONS[prefix])
+        self.cache.invalidate((VERSION_PREFIX, None))
+
+    def _cached(self, prefix: str, key, loader: Callable, *args):
+        """
+        Returns a cached read for prefix and key, loading it on a miss.
+        When the load fell back to memory storage the last cached value is served instead,
+        even if expired, and fallback results are not cached.
+        """
+        value = self.cache.get((prefix, key), _MISSING)
+        if value is not _MISSING:
+            return value
+
+        self._local.degraded = False
+        value = loader(*args)
+        if self._local.degraded:
+            stale = self.cache.get_stale((prefix, key), _MISSING)
+            return value if stale is _MISSING else stale
+
+        self.cache.set((prefix, key), value, CACHE_TTLS[prefix])
+        return value
+
+    def cache_stats(self) -> dict[str, int | float]:
+        """Returns cache hit/miss counters."""
+        return self.cache.stats()
+
+    @staticmethod
+    def _parse_weight_guess(data: str | None) -> tuple[str | None, float | None]:
+        """Decodes a stored weight guess into (date, weight)."""
+        if data is None:
             return None, None
-    
-    def get_trainings(self) -> dict[str, dict]:
-        """Gets all training data from Redis."""
         try:
-            training_keys = self.redis.keys(f"{TRAININGS_PREFIX}*")
-            result = {}
-            
-            for training_key in training_keys:
-                training_data = self.redis.get(training_key)
-                
-                if training_data is not None:
-                    # Format: training_YYYY-MM-DD|duration|exercise_name|reps|exercise_name|reps|...
-                    date_key = training_key.replace(TRAININGS_PREFIX, "", 1)
-                    data_parts = training_data.split("|")
-                    
-                    # Date and duration
-                    workout_date = data_parts[0] if len(data_parts) > 0 else ""
-                    duration = data_parts[1] if len(data_parts) > 1 else ""
-                    
-                    # Exercises and reps
-                    exercises = []
-                    for i in range(2, len(data_parts), 2):
-                        if i + 1 < len(data_parts):
-                            exercise_name = data_parts[i]
-                            reps = data_parts[i + 1]
-                            exercises.append({"name": exercise_name, "reps": reps})
-                    
-                    result[date_key] = {
-                        "date": workout_date,
-                        "duration": duration,
-                        "exercises": exercises
-                    }
-            
-            return result
-        
-        except Exception as e:
-            logger.error(f"Error fetching trainings from Redis: {e}")
-            return {}
-    
-    def _get_user_from_memory(self, username: str) -> str | None:
-        """Gets users from memory storage"""
-        try:
-            return self.users_memory[username]
-        
-        except Exception as e:
-            logger.error(f"Error fetching user from memory: {e}")
-            return None
-    
-    def _add_user_to_memory(self, username: str, password: str) -> None:
-        """Adds user to memory storage"""
-        self.users_memory[username] = password
-    
-    def _get_weight_from_memory(self, date: str) -> float | None:
-        """Gets weight from memory storage"""
-        try:
-            return self.weights_memory[date]
-        
-        except Exception as e:
-            logger.error(f"Error fetching weight from memory: {e}")
-            return None
-    
-    def _add_weight_to_memory(self, weight: float, date: str) -> None:
-        """Adds weight to memory storage"""
-        self.weights_memory[date] = weight
-    
-    def _add_weight_guess_to_memory(self, username: str, date: str, weight: float) -> None:
-        """Adds weight guess to memory storage"""
-        self.weight_guesses_memory[username] = f"{date}|{weight}"
-    
-    def _get_weight_guess_from_memory(self, username: str) -> tuple[str | None, float | None]:
-        """Gets weight guess from memory storage"""
-        try:
-            result = self.weight_guesses_memory.get(username)
-            if result is None:
-                return None, None
-            
-            date_str, weight_str = result.split("|")
-            return date_str, float(weight_str)
-        
+            return decode_weight_guess(data)
+
         except Exception as e:
-            logger.error(f"Error fetching weight guess from memory: {e}")
+            logger.error("Error decoding weight guess: {}", e)
             return None, None
 
 
 upstash = Upstash()
+metrics.register_gauge("progress_storage_breaker_open", "1 while storage calls skip the backend.",
+                       lambda: int(upstash.breaker.state == CircuitBreaker.OPEN))
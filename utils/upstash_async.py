@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+from upstash_redis.asyncio import Redis as AsyncRedis
+
+from utils.logger import logger
+from utils.metrics import STORAGE_CALLS, STORAGE_DURATION, STORAGE_ERRORS, STORAGE_FALLBACKS, metrics
+from utils.resilience import create_async_http_client, is_backend_failure, retry_async
+from utils.storage import WEIGHTS_PREFIX, WEIGHT_GUESSES_PREFIX, WEIGHT_SERIES, series_key
+from utils.upstash import CACHE_TTLS
+
+if TYPE_CHECKING:
+    from utils.upstash import Upstash
+
+
+_MISSING = object()
+
+
+class AsyncRunner:
+    """Runs coroutines on a background event loop so sync Flask views can await them together."""
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pid: int | None = None
+        self._lock = Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Starts the loop thread on first use (and again in a forked worker)."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                Thread(target=self._loop.run_forever, name="upstash-async", daemon=True).start()
+            return self._loop
+
+    def gather(self, *awaitables: Awaitable) -> list[Any]:
+        """Runs awaitables concurrently and blocks until all results are in."""
+        async def _gather():
+            return await asyncio.gather(*awaitables)
+
+        return asyncio.run_coroutine_threadsafe(_gather(), self._get_loop()).result()
+
+
+class AsyncUpstash:
+    """Async counterpart of the Upstash reads, sharing its cache and memory fallback."""
+    def __init__(self, store: "Upstash", url: str | None, token: str | None):
+        self.store = store
+        self._url = url
+        self._token = token
+        self._redis: AsyncRedis | None = None
+        self._pid: int | None = None
+        self._closing: set[asyncio.Task] = set()
+
+    @property
+    def redis(self) -> AsyncRedis | None:
+        """Async client, created inside the running loop of the current process."""
+        if self._url is None or self._token is None:
+            return None
+        if self._redis is None or self._pid != os.getpid():
+            self._redis = AsyncRedis(url=self._url, token=self._token, rest_retries=0)
+            # Pooled keep-alive client with timeouts, see RedisBackend._create_client. The default client
+            # it replaces has no connections yet, closing it only needs the loop this runs in
+            replaced = self._redis._http._client
+            self._redis._http._client = create_async_http_client()
+            task = asyncio.get_running_loop().create_task(replaced.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+            self._pid = os.getpid()
+        return self._redis
+
+    async def _cached(self, prefix: str, key, loader: Callable[..., Awaitable], fallback: Callable, *args):
+        """
+        Returns a cached read for prefix and key, awaiting loader on a miss with retries.
+        Shares the circuit breaker of the store: while it is open, or when loading failed,
+        the last cached value is served even if expired, else the memory fallback is read.
+        """
+        cache, breaker = self.store.cache, self.store.breaker
+        value = cache.get((prefix, key), _MISSING)
+        if value is not _MISSING:
+            return value
+
+        operation = loader.__name__.lstrip("_")
+        start = time.perf_counter()
+        metrics.inc(STORAGE_CALLS, operation)
+        if breaker.allow():
+            try:
+                value = await retry_async(loader, *args)
+                breaker.record_success()
+                metrics.observe(STORAGE_DURATION, time.perf_counter() - start, operation)
+                cache.set((prefix, key), value, CACHE_TTLS[prefix])
+                return value
+
+            except Exception as e:
+                if is_backend_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+                metrics.inc(STORAGE_ERRORS, operation)
+                logger.error("Error in async {}: {}", operation, e)
+
+        metrics.inc(STORAGE_FALLBACKS, operation)
+        stale = cache.get_stale((prefix, key), _MISSING)
+        return fallback(*args) if stale is _MISSING else stale
+
+    async def get_weight(self, date: str) -> float | None:
+        """Gets weight from cache, Redis or memory fallback."""
+        if self.redis is None or not self.store.backend.weights_migrated:
+            # Sync reads must not block the loop the other requests' lookups run on
+            return await asyncio.get_running_loop().run_in_executor(None, self.store.get_weight, date)
+        return await self._cached(WEIGHTS_PREFIX, date, self._get_weight, self.store.fallback.get_weight, date)
+
+    async def _get_weight(self, date: str) -> float | None:
+        result = await self.redis.hget(series_key(WEIGHT_SERIES, date), date[8:])
+        if result is None:
+            return None
+        return float(result)
+
+    async def get_weight_guess(self, username: str) -> tuple[str | None, float | None]:
+        """Gets weight guess from cache, Redis or memory fallback. Returns tuple of (date, weight)"""
+        if self.redis is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.store.get_weight_guess, username)
+        return await self._cached(WEIGHT_GUESSES_PREFIX, username, self._get_weight_guess,
+                                  self._get_fallback_weight_guess, username)
+
+    async def _get_weight_guess(self, username: str) -> tuple[str | None, float | None]:
+        return self.store._parse_weight_guess(await self.redis.get(f"{WEIGHT_GUESSES_PREFIX}{username}"))
+
+    def _get_fallback_weight_guess(self, username: str) -> tuple[str | None, float | None]:
+        return self.store._parse_weight_guess(self.store.fallback.get_weight_guess(username))
+
+    async def get_guess_result(self, username: str,
+                               likely_dates: list[str]) -> tuple[str | None, float | None, float | None]:
+        """
+        Gets the weight guess of username and the weight of its date as (date, weight, actual weight).
+        The weights of likely_dates are fetched alongside the guess, so a guess for one of them takes
+        one round trip, any other date a second one.
+        """
+        weights = asyncio.gather(*[self.get_weight(date) for date in likely_dates])
+        try:
+            guess_date, guess_weight = await self.get_weight_guess(username)
+            likely_weights = dict(zip(likely_dates, await weights))
+        finally:
+            if not weights.done():
+                # The guess lookup raised, stop the weight lookups and collect their cancellation
+                weights.cancel()
+                await asyncio.gather(weights, return_exceptions=True)
+        if guess_date is None:
+            return None, None, None
+        if guess_date in likely_weights:
+            return guess_date, guess_weight, likely_weights[guess_date]
+        return guess_date, guess_weight, await self.get_weight(guess_date)
@@ -0,0 +1,92 @@
+import csv
+import io
+import math
+
+from datetime import datetime
+from typing import IO, Callable, Final, Iterable, Iterator
+
+from utils.logger import logger
+from utils.upstash import upstash
+
+
+IMPORT_BATCH_SIZE: Final = 500
+MAX_REPORTED_ERRORS: Final = 10
+
+
+def read_rows(lines: Iterable[str], result: dict) -> Iterator[tuple[str, float]]:
+    """
+    Yields validated (date, value) rows from CSV lines with a date and a value column,
+    such as date,weight or date,calories.
+    A header row is skipped, invalid rows are counted in result["invalid"] and the
+    first MAX_REPORTED_ERRORS of them described in result["errors"].
+    """
+    for line_number, row in enumerate(csv.reader(lines), start=1):
+        if not row or not "".join(row).strip():
+            continue
+        if line_number == 1 and row[0].strip().lower() == "date":
+            continue
+        
+        try:
+            # strptime accepts 2025-1-5, storage keys need the zero padded date
+            date = datetime.strptime(row[0].strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            value = float(row[1])
+            if not math.isfinite(value) or value <= 0:
+                raise ValueError(f"value must be a positive number: {row[1].strip()}")
+            yield date, value
+        
+        except (IndexError, ValueError) as e:
+            result["invalid"] += 1
+            if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                result["errors"].append(f"Line {line_number}: {e}")
+
+
+def import_weights(lines: Iterable[str],
+                   overwrite: bool = False,
+                   batch_size: int = IMPORT_BATCH_SIZE) -> dict[str, int | list[str]]:
+    """Streams weight rows from CSV lines into storage in batches."""
+    return _import_rows(lines, upstash.add_weights, "weights", overwrite, batch_size)
+
+
+def import_calories(lines: Iterable[str],
+                    overwrite: bool = False,
+                    batch_size: int = IMPORT_BATCH_SIZE) -> dict[str, int | list[str]]:
+    """Streams calorie rows from CSV lines into storage in batches."""
+    return _import_rows(lines, upstash.add_calories, "calories", overwrite, batch_size)
+
+
+def _import_rows(lines: Iterable[str],
+                 writer: Callable[[list[tuple[str, float]], bool], int],
+                 name: str,
+                 overwrite: bool,
+                 batch_size: int) -> dict[str, int | list[str]]:
+    """Streams validated rows into writer in batches."""
+    result = {"written": 0, "skipped": 0, "invalid": 0, "errors": []}
+    batch = []
+    
+    def flush():
+        written = writer(batch, overwrite)
+        result["written"] += written
+        result["skipped"] += len(batch) - written
+        batch.clear()
+    
+    for row in read_rows(lines, result):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    
+    logger.info(f"Imported {name}: written={result['written']} skipped={result['skipped']} invalid={result['invalid']}")
+    return result
+
+
+def import_weights_file(file: IO[bytes], overwrite: bool = False) -> dict[str, int | list[str]]:
+    """Imports weights from a binary CSV file, such as an uploaded file stream."""
+    return import_weights(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""), overwrite)
+
+
+def export_weights() -> Iterator[str]:
+    """Yields the stored weights as CSV lines, one row at a time."""
+    yield "date,weight\r\n"
+    for date, weight in upstash.iter_weights():
+        yield f"{date},{weight}\r\n"